@@ -1,14 +1,29 @@
 import os
-from datetime import datetime, timedelta
+import json
+import time
+import uuid
+import gzip
+import base64
+import mimetypes
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 import logging
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 from sqlalchemy.exc import IntegrityError
 
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse
-from swagger_ui_bundle import swagger_ui_2_path as swagger_ui_path
+from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.concurrency import run_in_threadpool
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("preciosa")
@@ -17,10 +32,15 @@ from pydantic import BaseModel, EmailStr
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
+from migrations import check_schema
+from request_metrics import RequestMetricsMiddleware, request_metrics
+from request_profiler import RequestProfiler, RequestProfilerMiddleware
+
 
-from sqlalchemy import create_engine, ForeignKey, String, Integer, Float, DateTime
+from sqlalchemy import create_engine, event, select, insert, and_, or_, ForeignKey, Index, String, Integer, Float, DateTime
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column, relationship, Session
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("precoisa")  # nome que você quiser
 
@@ -31,18 +51,170 @@ JWT_EXPIRES_DAYS = 30
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./preco.db")
 JWT_SECRET = os.getenv("JWT_SECRET", "dev-secret-change-this")
 CORS_ALLOW_ORIGINS = os.getenv("CORS_ALLOW_ORIGINS", "*")
+ORDERS_PAGE_SIZE = int(os.getenv("ORDERS_PAGE_SIZE", "50"))
+ORDERS_MAX_PAGE_SIZE = 200
+
+# Auth: cache de usuários e modo "confiar nas claims" (sem ir ao banco por request)
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_TRUST_CLAIMS = os.getenv("AUTH_TRUST_CLAIMS", "false").lower() in ("1", "true", "yes")
+REVOKED_TOKENS_FILE = os.getenv("REVOKED_TOKENS_FILE")  # opcional: persiste a lista de revogação
+
+# Senhas: custo do bcrypt e pool dedicado (fora do threadpool dos handlers)
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+# Pool: dimensione DB_POOL_SIZE + DB_MAX_OVERFLOW x workers abaixo do max_connections do Postgres
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Modo async (opt-in): handlers de pedidos com AsyncSession em vez do threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() in ("1", "true", "yes")
+
+# Perfil SQLite
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Perfil Postgres
+PG_STATEMENT_TIMEOUT_MS = int(os.getenv("PG_STATEMENT_TIMEOUT_MS", "15000"))
+PG_PREPARE_THRESHOLD = int(os.getenv("PG_PREPARE_THRESHOLD", "5"))
 
 # ------------ DB ------------
+def normalize_database_url(url: str) -> str:
+    # Render/Heroku entregam postgres:// — o driver usado é o psycopg 3
+    if url.startswith("postgres://"):
+        return url.replace("postgres://", "postgresql+psycopg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+psycopg://", 1)
+    return url
+
+def connect_args_for(url: str) -> dict:
+    if url.startswith("sqlite"):
+        return {"check_same_thread": False}
+    if url.startswith("postgresql"):
+        return {
+            # Prepared statements no servidor após N execuções da mesma query
+            "prepare_threshold": PG_PREPARE_THRESHOLD,
+            "options": f"-c statement_timeout={PG_STATEMENT_TIMEOUT_MS}",
+            "application_name": "preciosa-api",
+        }
+    return {}
+
+def _sqlite_pragmas(dbapi_conn, connection_record):
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    cur.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cur.close()
+
+def install_profile(sync_engine, url: str) -> None:
+    if url.startswith("sqlite"):
+        event.listen(sync_engine, "connect", _sqlite_pragmas)
+
+# O perfil é escolhido pela URL já normalizada, antes de criar o engine
+DATABASE_URL = normalize_database_url(DATABASE_URL)
+pool_args = {} if ":memory:" in DATABASE_URL else {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+}
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {},
+    connect_args=connect_args_for(DATABASE_URL),
+    pool_pre_ping=DB_POOL_PRE_PING,
+    **pool_args,
 )
-if DATABASE_URL.startswith("postgres://"):
-    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql+psycopg://", 1)
-elif DATABASE_URL.startswith("postgresql://"):
-    DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+psycopg://", 1)
+install_profile(engine, DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
 
+def async_database_url(url: str) -> str:
+    # aiosqlite para SQLite; o dialeto psycopg (v3) já é async no Postgres
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_ASYNC:
+    # aiosqlite usa NullPool por padrão; força o pool com fila para honrar DB_POOL_*
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL),
+        connect_args=connect_args_for(DATABASE_URL),
+        pool_pre_ping=DB_POOL_PRE_PING,
+        **({"poolclass": AsyncAdaptedQueuePool, **pool_args} if pool_args else {}),
+    )
+    install_profile(async_engine.sync_engine, DATABASE_URL)
+    AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+class PoolMetrics:
+    """Contadores de checkout/checkin do pool, alimentados pelos eventos do SQLAlchemy.
+    Os eventos disparam nas threads do threadpool, daí o lock em volta dos contadores"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *args):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *args):
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _on_checkin(self, *args):
+        with self._lock:
+            self.in_use -= 1
+
+    def _on_invalidate(self, *args):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.pool
+        with self._lock:
+            counters = {
+                "in_use": self.in_use,
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+            }
+        return {
+            "pool_size": pool.size() if hasattr(pool, "size") else None,
+            "overflow": pool.overflow() if hasattr(pool, "overflow") else None,
+            "checked_in": pool.checkedin() if hasattr(pool, "checkedin") else None,
+            **counters,
+        }
+
+pool_metrics = PoolMetrics(engine)
+
+def get_db():
+    # Uma sessão por request, compartilhada entre a autenticação e o handler
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 class Base(DeclarativeBase):
     pass
 
@@ -58,8 +230,9 @@ class User(Base):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_orders_user_id_created_at", "user_id", "created_at"),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     total: Mapped[float] = mapped_column(Float, default=0.0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     channel: Mapped[str] = mapped_column(String(50), default="whatsapp")
@@ -70,7 +243,7 @@ class Order(Base):
 class OrderItem(Base):
     __tablename__ = "order_items"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
     product_id: Mapped[str] = mapped_column(String(50))
     sku: Mapped[str] = mapped_column(String(100))
     name: Mapped[str] = mapped_column(String(200))
@@ -79,7 +252,8 @@ class OrderItem(Base):
 
     order: Mapped["Order"] = relationship(back_populates="items")
 
-Base.metadata.create_all(engine)
+# Schema: versionado em migrations.py (sem create_all no import)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true" if DATABASE_URL.startswith("sqlite") else "false").lower() in ("1", "true", "yes")
 
 # ------------ Schemas ------------
 class RegisterIn(BaseModel):
@@ -130,30 +304,364 @@ class AuthOut(BaseModel):
     user: UserOut
 
 # ------------ Auth helpers ------------
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+
+class PrincipalCache:
+    """LRU com TTL de usuários autenticados; thread-safe (handlers sync rodam no threadpool)"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(user_id, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, principal: Principal) -> None:
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+def _file_lock(f, shared: bool) -> None:
+    # Lock entre processos até o arquivo ser fechado; sem fcntl (Windows) roda sem lock
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+
+class RevocationList:
+    """jti revogados até expirarem; em memória e, se configurado, num arquivo JSON lines
+    compartilhado pelos workers (relido quando o mtime muda)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._revoked: dict = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+        self._reload()
+
+    def _merge(self, f) -> None:
+        now = time.time()
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # linha em branco ou corrompida
+            if entry["exp"] > now:
+                self._revoked[entry["jti"]] = entry["exp"]
+
+    def _reload(self) -> None:
+        # Um stat por checagem; só relê o arquivo quando outro worker o reescreveu
+        try:
+            stat = os.stat(self.path) if self.path else None
+        except FileNotFoundError:
+            return
+        if stat is None or (stat.st_mtime_ns, stat.st_size) == self._stamp:
+            return
+        with self._lock, open(self.path) as f:
+            _file_lock(f, shared=True)
+            self._merge(f)
+            stat = os.fstat(f.fileno())
+            self._stamp = (stat.st_mtime_ns, stat.st_size)
+
+    def revoke(self, jti: str, exp: float) -> None:
+        with self._lock:
+            self._revoked[jti] = exp
+            if not self.path:
+                return
+            # Reescreve no lugar (não os.replace) para que os outros workers, presos ao lock do
+            # mesmo arquivo, não percam revogações; entradas expiradas saem nessa hora
+            with open(self.path, "a+") as f:
+                _file_lock(f, shared=False)
+                f.seek(0)
+                self._merge(f)
+                now = time.time()
+                self._revoked = {k: v for k, v in self._revoked.items() if v > now}
+                f.seek(0)
+                f.truncate()
+                f.writelines(json.dumps({"jti": k, "exp": v}) + "\n" for k, v in self._revoked.items())
+                f.flush()
+                stat = os.fstat(f.fileno())
+                self._stamp = (stat.st_mtime_ns, stat.st_size)
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        self._reload()
+        exp = self._revoked.get(jti)
+        if exp is None:
+            return False
+        if exp < time.time():
+            with self._lock:
+                self._revoked.pop(jti, None)
+            return False
+        return True
+
+principal_cache = PrincipalCache(AUTH_CACHE_TTL, AUTH_CACHE_SIZE)
+revoked_tokens = RevocationList(REVOKED_TOKENS_FILE)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+
 def create_token(user_id: int, email: str) -> str:
     payload = {
         "sub": str(user_id),
         "email": email,
+        "jti": uuid.uuid4().hex,
         "exp": datetime.utcnow() + timedelta(days=JWT_EXPIRES_DAYS),
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALG)
 
-def get_current_user(db: Session = Depends(lambda: SessionLocal())):
-    def _dep(request: Request):
-        auth = request.headers.get("Authorization", "")
-        if not auth.startswith("Bearer "):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-        tkn = auth[7:]
-        try:
-            data = jwt.decode(tkn, JWT_SECRET, algorithms=[JWT_ALG])
-            user_id = int(data.get("sub", "0"))
-        except JWTError:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        user = db.get(User, user_id)
-        if not user:
-            raise HTTPException(status_code=401, detail="User not found")
+def decode_token(request: Request) -> dict:
+    auth = request.headers.get("Authorization", "")
+    if not auth.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    tkn = auth[7:]
+    try:
+        data = jwt.decode(tkn, JWT_SECRET, algorithms=[JWT_ALG])
+        int(data.get("sub", "0"))
+    except (JWTError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token")
+    if revoked_tokens.is_revoked(data.get("jti")):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return data
+
+def principal_without_db(data: dict) -> Optional[Principal]:
+    user_id = int(data["sub"])
+    if AUTH_TRUST_CLAIMS:
+        # Token assinado + lista de revogação bastam; nenhum acesso ao banco
+        return Principal(id=user_id, email=data.get("email", ""))
+    return principal_cache.get(user_id)
+
+def principal_from_user(user: Optional[User]) -> Principal:
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
+    principal = Principal(id=user.id, email=user.email)
+    principal_cache.set(principal)
+    return principal
+
+def get_current_user(request: Request, db: Session = Depends(get_db)) -> Principal:
+    data = decode_token(request)
+    return principal_without_db(data) or principal_from_user(db.get(User, int(data["sub"])))
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)) -> Principal:
+    data = decode_token(request)
+    return principal_without_db(data) or principal_from_user(await db.get(User, int(data["sub"])))
+
+# ------------ Password hashing ------------
+# min = max = default: hashes com outro custo são refeitos no próximo login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+class PasswordPool:
+    """Executor próprio e limitado para bcrypt; o threadpool do Starlette fica livre para o resto"""
+
+    def __init__(self, context: CryptContext, max_workers: int):
+        self.context = context
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = None
+        # Só alterados no event loop
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.rehashed = 0
+        self._wait_total = 0.0
+        self._work_total = 0.0
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        async with self._slots:
+            self.waiting -= 1
+            self.active += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            finally:
+                self.active -= 1
+                self.completed += 1
+                self._wait_total += started - queued_at
+                self._work_total += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify_and_update(self, password: str, password_hash: str):
+        """(ok, novo_hash); novo_hash vem preenchido quando o custo configurado mudou"""
+        ok, new_hash = await self._run(self.context.verify_and_update, password, password_hash)
+        if new_hash:
+            self.rehashed += 1
+        return ok, new_hash
+
+    def stats(self) -> dict:
+        done = self.completed or 1
+        return {
+            "rounds": BCRYPT_ROUNDS,
+            "max_workers": self.max_workers,
+            "waiting": self.waiting,
+            "active": self.active,
+            "completed": self.completed,
+            "rehashed": self.rehashed,
+            "avg_wait_ms": round(self._wait_total / done * 1000, 2),
+            "avg_hash_ms": round(self._work_total / done * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+password_pool = PasswordPool(pwd_context, PASSWORD_HASH_WORKERS)
+
+def find_user_by_email(email: str) -> Optional[User]:
+    with SessionLocal() as db:
+        return db.query(User).filter(User.email == email).first()
+
+def save_new_user(name: str, email: str, phone: str, password_hash: str) -> User:
+    with SessionLocal() as db:
+        user = User(name=name, email=email, phone=phone, password_hash=password_hash)
+        db.add(user)
+        db.commit()
+        db.refresh(user)
         return user
-    return _dep
+
+def update_password_hash(user_id: int, password_hash: str) -> None:
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        if user:
+            user.password_hash = password_hash
+            db.commit()
+
+# ------------ Order queries ------------
+ORDER_ROW_COLUMNS = (
+    Order.id, Order.total, Order.created_at, Order.channel,
+    OrderItem.product_id, OrderItem.sku, OrderItem.name, OrderItem.qty, OrderItem.price,
+)
+
+def encode_order_cursor(order: dict) -> str:
+    raw = f"{order['created_at'].isoformat()}|{order['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_order_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, oid = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(oid)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def as_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at é gravado como UTC sem fuso
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def user_orders_stmt(
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+):
+    """Uma página de pedidos (keyset em created_at, id) com os itens, em um único SELECT"""
+    page = select(Order.id).where(Order.user_id == user_id)
+    if since is not None:
+        page = page.where(Order.created_at >= as_naive_utc(since))
+    if until is not None:
+        page = page.where(Order.created_at < as_naive_utc(until))
+    if cursor:
+        created_at, oid = decode_order_cursor(cursor)
+        page = page.where(or_(
+            Order.created_at < created_at,
+            and_(Order.created_at == created_at, Order.id < oid),
+        ))
+    # Busca um pedido a mais para saber se existe próxima página
+    page = page.order_by(Order.created_at.desc(), Order.id.desc()).limit(limit + 1).subquery()
+
+    return (
+        select(*ORDER_ROW_COLUMNS)
+        .join(page, page.c.id == Order.id)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .order_by(Order.created_at.desc(), Order.id.desc(), OrderItem.id)
+    )
+
+def orders_page(rows, limit: int):
+    orders = order_rows_to_dicts(rows)
+    next_cursor = None
+    if len(orders) > limit:
+        orders = orders[:limit]
+        next_cursor = encode_order_cursor(orders[-1])
+    return orders, next_cursor
+
+def fetch_user_orders(db: Session, user_id: int, limit: int = ORDERS_PAGE_SIZE, *filters):
+    return orders_page(db.execute(user_orders_stmt(user_id, limit, *filters)), limit)
+
+async def fetch_user_orders_async(db: AsyncSession, user_id: int, limit: int = ORDERS_PAGE_SIZE, *filters):
+    return orders_page(await db.execute(user_orders_stmt(user_id, limit, *filters)), limit)
+
+def order_rows_to_dicts(rows) -> List[dict]:
+    orders: dict = {}
+    for oid, total, created_at, channel, product_id, sku, name, qty, price in rows:
+        order = orders.get(oid)
+        if order is None:
+            order = orders[oid] = {"id": oid, "total": total, "created_at": created_at, "channel": channel, "items": []}
+        if product_id is not None:
+            order["items"].append({"product_id": product_id, "sku": sku, "name": name, "qty": qty, "price": price})
+    return list(orders.values())
+
+def new_order_values(payload: "OrderIn") -> dict:
+    return {
+        "total": payload.total,
+        "created_at": datetime.utcfromtimestamp(payload.created_at/1000) if payload.created_at else datetime.utcnow(),
+        "channel": payload.channel or "whatsapp",
+    }
+
+def insert_order(db: Session, user_id: int, payload: "OrderIn") -> dict:
+    """Grava o pedido com INSERT ... RETURNING e os itens num único executemany"""
+    order = new_order_values(payload)
+    order["id"] = db.execute(
+        insert(Order).values(user_id=user_id, **order).returning(Order.id)
+    ).scalar_one()
+    order["items"] = [it.model_dump() for it in payload.items]
+    if order["items"]:
+        db.execute(insert(OrderItem), [{"order_id": order["id"], **it} for it in order["items"]])
+    # A resposta sai do próprio payload, sem recarregar o pedido do banco
+    return order
+
+async def insert_order_async(db: AsyncSession, user_id: int, payload: "OrderIn") -> dict:
+    order = new_order_values(payload)
+    result = await db.execute(insert(Order).values(user_id=user_id, **order).returning(Order.id))
+    order["id"] = result.scalar_one()
+    order["items"] = [it.model_dump() for it in payload.items]
+    if order["items"]:
+        await db.execute(insert(OrderItem), [{"order_id": order["id"], **it} for it in order["items"]])
+    return order
 
 # ------------ App ------------
 app = FastAPI(
@@ -171,49 +679,99 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+# Profiler de requests lentos: desligado sem PROFILE_ROUTES/PROFILE_TOKEN (ver request_profiler.py)
+request_profiler = RequestProfiler.from_env()
+if request_profiler.enabled:
+    app.add_middleware(RequestProfilerMiddleware, profiler=request_profiler)
+# Métricas por rota: o mais externo, para a latência incluir CORS e tratamento de erros
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
 
-# ---------- Swagger local robusto (detecta pasta/arquivos em tempo de execução) ----------
-from fastapi.responses import HTMLResponse
-import os
+# ---------- Swagger local (resolvido no primeiro acesso, não no import) ----------
+SWAGGER_CACHE_CONTROL = "public, max-age=31536000, immutable"
+SWAGGER_COMPRESS_MIN_BYTES = 1024
 
-# Tenta importar um dos caminhos disponíveis do pacote
-try:
-    from swagger_ui_bundle import swagger_ui_4_path as _base_path
-except Exception:
+
+@lru_cache(maxsize=1)
+def swagger_static_dir() -> Optional[str]:
+    """Descobre a pasta dos estáticos do swagger_ui_bundle; None se o pacote não existir"""
+    try:
+        import swagger_ui_bundle
+    except ImportError:
+        return None
+    for name in ("swagger_ui_4_path", "swagger_ui_3_path", "swagger_ui_2_path", "swagger_ui_path"):
+        base = getattr(swagger_ui_bundle, name, None)
+        if not base:
+            continue
+        # algumas versões apontam direto pra pasta, outras guardam dentro de /static
+        for candidate in (base, os.path.join(base, "static")):
+            if os.path.exists(os.path.join(candidate, "swagger-ui.css")):
+                return os.path.realpath(candidate)
+    return None
+
+
+def _brotli():
     try:
-        from swagger_ui_bundle import swagger_ui_3_path as _base_path
-    except Exception:
-        from swagger_ui_bundle import swagger_ui_2_path as _base_path  # versão mais antiga
-
-# Descobrir a pasta real onde estão os arquivos
-candidates = [
-    _base_path,                     # algumas versões já apontam direto pra pasta correta
-    os.path.join(_base_path, "static"),  # outras guardam dentro de /static
-]
-SWAGGER_DIR = None
-for p in candidates:
-    if os.path.exists(os.path.join(p, "swagger-ui.css")):
-        SWAGGER_DIR = p
-        break
-if SWAGGER_DIR is None:
-    # fallback mesmo assim
-    SWAGGER_DIR = _base_path
-
-# Descobrir o nome do JS principal e se existe o standalone-preset
-if os.path.exists(os.path.join(SWAGGER_DIR, "swagger-ui-bundle.js")):
-    JS_MAIN = "swagger-ui-bundle.js"
-else:
-    # versões antigas usam swagger-ui.js
-    JS_MAIN = "swagger-ui.js"
-
-HAS_STANDALONE = os.path.exists(os.path.join(SWAGGER_DIR, "swagger-ui-standalone-preset.js"))
-
-# Montar os estáticos
-app.mount("/_swagger", StaticFiles(directory=SWAGGER_DIR, html=True), name="swagger_static")
-
-
-from fastapi.responses import HTMLResponse
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+_swagger_assets: dict = {}
+_swagger_assets_lock = threading.Lock()
+
+
+def swagger_asset(path: str, encoding: str) -> Optional[bytes]:
+    """Conteúdo do arquivo (identity/gzip/br), comprimido uma vez e mantido em memória"""
+    key = (path, encoding)
+    body = _swagger_assets.get(key)
+    if body is not None:
+        return body
+    if encoding == "identity":
+        with open(path, "rb") as f:
+            body = f.read()
+    else:
+        raw = swagger_asset(path, "identity")
+        body = gzip.compress(raw, compresslevel=9, mtime=0) if encoding == "gzip" else _brotli().compress(raw)
+    with _swagger_assets_lock:
+        _swagger_assets[key] = body
+    return body
+
+
+def pick_encoding(accept_encoding: str, size: int) -> str:
+    if size < SWAGGER_COMPRESS_MIN_BYTES:
+        return "identity"
+    accepted = {part.split(";")[0].strip() for part in accept_encoding.lower().split(",")}
+    if "br" in accepted and _brotli() is not None:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+
+@app.get("/_swagger/{asset:path}", include_in_schema=False)
+async def swagger_static(asset: str, request: Request):
+    base = swagger_static_dir()
+    if base is None:
+        raise HTTPException(status_code=404, detail="Swagger UI não instalado")
+    path = os.path.realpath(os.path.join(base, asset or "index.html"))
+    if os.path.isdir(path):
+        path = os.path.join(path, "index.html")
+    if not path.startswith(base + os.sep) or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Arquivo não encontrado")
+
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""), os.path.getsize(path))
+    # Primeira compressão de um bundle grande leva alguns ms: fora do event loop
+    body = swagger_asset(path, encoding) if (path, encoding) in _swagger_assets \
+        else await run_in_threadpool(swagger_asset, path, encoding)
+    headers = {"Cache-Control": SWAGGER_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    return Response(content=body, media_type=media_type, headers=headers)
+
 
 DOCS_CDN_HTML = """
 <!doctype html>
@@ -255,47 +813,43 @@ def swagger_docs() -> HTMLResponse:
 
 # ------------ Endpoints ------------
 @app.post("/api/auth/register", response_model=AuthOut)
-def register(payload: RegisterIn):
+async def register(payload: RegisterIn):
     # --- NÃO EDITE PARA NÃO PERDER O try/except ---
     try:
-        with SessionLocal() as db:
-            # E-mail já cadastrado?
-            existing = db.query(User).filter(
-                User.email == payload.email.lower().strip()
-            ).first()
-            if existing:
-                raise HTTPException(status_code=409, detail="E-mail já registrado")
-
-            # Validação da senha (bcrypt: máx. 72 bytes)
-            pwd = (payload.password or "").strip()
-            if not pwd:
-                raise HTTPException(status_code=422, detail="Senha obrigatória")
-
-            if len(pwd.encode("utf-8")) > 72:
-                raise HTTPException(status_code=422, detail="Senha muito longa (máx. 72 bytes)")
-
-            password_hash=pwd_context.hash(payload.password)
-
-            user = User(
-                name=payload.name.strip(),
-                email=payload.email.lower().strip(),
-                phone=(payload.phone or "").strip(),
-                password_hash=password_hash,
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
-
-            token = create_token(user.id, user.email)
-            return {
-                "token": token,
-                "user": {
-                    "id": user.id,
-                    "name": user.name,
-                    "email": user.email,
-                    "phone": user.phone,
-                },
-            }
+        # E-mail já cadastrado?
+        email = payload.email.lower().strip()
+        existing = await run_in_threadpool(find_user_by_email, email)
+        if existing:
+            raise HTTPException(status_code=409, detail="E-mail já registrado")
+
+        # Validação da senha (bcrypt: máx. 72 bytes)
+        pwd = (payload.password or "").strip()
+        if not pwd:
+            raise HTTPException(status_code=422, detail="Senha obrigatória")
+
+        if len(pwd.encode("utf-8")) > 72:
+            raise HTTPException(status_code=422, detail="Senha muito longa (máx. 72 bytes)")
+
+        password_hash = await password_pool.hash(payload.password)
+
+        user = await run_in_threadpool(
+            save_new_user,
+            payload.name.strip(),
+            email,
+            (payload.phone or "").strip(),
+            password_hash,
+        )
+
+        token = create_token(user.id, user.email)
+        return {
+            "token": token,
+            "user": {
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "phone": user.phone,
+            },
+        }
 
     except IntegrityError:
         # UNIQUE violation (e-mail duplicado), caso escape da checagem acima
@@ -313,58 +867,71 @@ def register(payload: RegisterIn):
 
 
 @app.post("/api/auth/login", response_model=AuthOut)
-def login(payload: LoginIn):
-    with SessionLocal() as db:
-        user = db.query(User).filter(User.email == payload.email.lower().strip()).first()
-        if not pwd_context.verify(payload.password, user.password_hash):
-            raise HTTPException(status_code=401, detail="Credenciais inválidas")
-        token = create_token(user.id, user.email)
-        return {"token": token, "user": {"id": user.id, "name": user.name, "email": user.email, "phone": user.phone}}
-
-@app.get("/api/orders", response_model=List[OrderOut])
-def list_orders(current: User = Depends(get_current_user())):
-    with SessionLocal() as db:
-        rows = db.query(Order).filter(Order.user_id == current.id).order_by(Order.created_at.desc()).all()
-        out: List[OrderOut] = []
-        for o in rows:
-            out.append(OrderOut(
-                id=o.id,
-                total=o.total,
-                created_at=o.created_at,
-                channel=o.channel,
-                items=[OrderItemOut(product_id=i.product_id, sku=i.sku, name=i.name, qty=i.qty, price=i.price) for i in o.items],
-            ))
-        return out
-
-@app.post("/api/orders", response_model=OrderOut)
-def create_order(payload: OrderIn, current: User = Depends(get_current_user())):
-    with SessionLocal() as db:
-        o = Order(
-            user_id=current.id,
-            total=payload.total,
-            created_at=datetime.utcfromtimestamp(payload.created_at/1000) if payload.created_at else datetime.utcnow(),
-            channel=payload.channel or "whatsapp",
-        )
-        db.add(o)
-        db.flush()
-        for it in payload.items:
-            db.add(OrderItem(
-                order_id=o.id,
-                product_id=it.product_id,
-                sku=it.sku,
-                name=it.name,
-                qty=it.qty,
-                price=it.price,
-            ))
-        db.commit()
-        db.refresh(o)
-        return OrderOut(
-            id=o.id,
-            total=o.total,
-            created_at=o.created_at,
-            channel=o.channel,
-            items=[OrderItemOut(product_id=i.product_id, sku=i.sku, name=i.name, qty=i.qty, price=i.price) for i in o.items],
-        )
+async def login(payload: LoginIn):
+    user = await run_in_threadpool(find_user_by_email, payload.email.lower().strip())
+    if not user:
+        raise HTTPException(status_code=401, detail="Credenciais inválidas")
+    ok, new_hash = await password_pool.verify_and_update(payload.password, user.password_hash)
+    if not ok:
+        raise HTTPException(status_code=401, detail="Credenciais inválidas")
+    if new_hash:
+        # BCRYPT_ROUNDS mudou desde que o hash foi gravado
+        await run_in_threadpool(update_password_hash, user.id, new_hash)
+    token = create_token(user.id, user.email)
+    return {"token": token, "user": {"id": user.id, "name": user.name, "email": user.email, "phone": user.phone}}
+
+@app.post("/api/auth/logout")
+def logout(request: Request):
+    data = decode_token(request)
+    if data.get("jti"):
+        revoked_tokens.revoke(data["jti"], float(data["exp"]))
+    return {"ok": True}
+
+def list_orders(
+    response: Response,
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=ORDERS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current: Principal = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    orders, next_cursor = fetch_user_orders(db, current.id, limit, cursor, since, until)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
+async def list_orders_async(
+    response: Response,
+    limit: int = Query(ORDERS_PAGE_SIZE, ge=1, le=ORDERS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    current: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    orders, next_cursor = await fetch_user_orders_async(db, current.id, limit, cursor, since, until)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return orders
+
+def create_order(payload: OrderIn, current: Principal = Depends(get_current_user), db: Session = Depends(get_db)):
+    order = insert_order(db, current.id, payload)
+    db.commit()
+    return order
+
+async def create_order_async(
+    payload: OrderIn,
+    current: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db),
+):
+    order = await insert_order_async(db, current.id, payload)
+    await db.commit()
+    return order
+
+# Registra a variante sync (threadpool) ou async (DB_ASYNC=true) dos endpoints de pedidos
+app.get("/api/orders", response_model=List[OrderOut])(list_orders_async if DB_ASYNC else list_orders)
+app.post("/api/orders", response_model=OrderOut)(create_order_async if DB_ASYNC else create_order)
 
 @app.get("/api/health")
 def health_check():
@@ -376,6 +943,46 @@ def health_check():
         logger.exception("DB health failed")
         raise HTTPException(status_code=500, detail="db_down")
 
+@app.get("/api/health/pool")
+def pool_status():
+    return {**pool_metrics.snapshot(), "auth_cache": {"hits": principal_cache.hits, "misses": principal_cache.misses}}
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return request_metrics.render()
+
+@app.get("/api/admin/profiles")
+def list_profiles(request: Request):
+    if not request_profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Envie X-Profile com o PROFILE_TOKEN")
+    return {"threshold_ms": request_profiler.threshold * 1000, "profiles": request_profiler.list()}
+
+@app.get("/api/admin/profiles/{name}", response_class=PlainTextResponse)
+def get_profile(name: str, request: Request):
+    if not request_profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Envie X-Profile com o PROFILE_TOKEN")
+    profile = request_profiler.read(name)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return profile
+
+@app.get("/api/health/passwords")
+def password_pool_status():
+    return password_pool.stats()
+
+
+@app.on_event("startup")
+def check_database_schema():
+    check_schema(engine, auto_migrate=AUTO_MIGRATE)
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    password_pool.shutdown()
 
 @app.get("/")
 def root():
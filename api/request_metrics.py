@@ -0,0 +1,147 @@
+"""Request metrics ASGI middleware with Prometheus text exposition.
+
+Shared by backend/, api/ and preco-backend/ (same file in each app dir; tests/test_shared_modules.py
+fails if the copies drift):
+
+    app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+
+    @app.get("/metrics", include_in_schema=False, response_class=PlainTextResponse)
+    def metrics():
+        return request_metrics.render()
+
+Series are keyed by route template, not raw path, so /api/products/{product_id}
+stays one series. Label strings are built once per (route, method); the hot path
+only does dict lookups and integer increments on the event loop thread.
+"""
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Upper bounds, Prometheus style
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+UNMATCHED = "<unmatched>"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class RouteStats:
+    __slots__ = ("labels", "latency", "latency_sum", "size", "size_sum", "count", "status")
+
+    def __init__(self, method: str, route: str):
+        self.labels = f'method="{method}",route="{_escape(route)}"'
+        self.latency = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.latency_sum = 0.0
+        self.size = [0] * (len(SIZE_BUCKETS) + 1)
+        self.size_sum = 0
+        self.count = 0
+        self.status: Dict[int, int] = {}
+
+    def observe(self, seconds: float, size: int, status: int) -> None:
+        self.latency[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.latency_sum += seconds
+        self.size[bisect_left(SIZE_BUCKETS, size)] += 1
+        self.size_sum += size
+        self.count += 1
+        self.status[status] = self.status.get(status, 0) + 1
+
+
+def _histogram(name: str, labels: str, buckets: Tuple, counts: List[int], total, count: int) -> List[str]:
+    lines = []
+    cumulative = 0
+    for bound, n in zip(buckets + (float("inf"),), counts):
+        cumulative += n
+        le = "+Inf" if bound == float("inf") else repr(bound)
+        lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+    lines.append(f"{name}_sum{{{labels}}} {total}")
+    lines.append(f"{name}_count{{{labels}}} {count}")
+    return lines
+
+
+class RequestMetrics:
+    def __init__(self):
+        # endpoint -> method -> RouteStats
+        self.routes: Dict[object, Dict[str, RouteStats]] = {}
+        self.in_flight = 0
+
+    def stats_for(self, scope: dict) -> RouteStats:
+        endpoint = scope.get("endpoint", UNMATCHED)
+        method = scope["method"]
+        by_method = self.routes.get(endpoint)
+        if by_method is None:
+            by_method = self.routes[endpoint] = {}
+        stats = by_method.get(method)
+        if stats is None:
+            # First request for this route/method only: resolve the path template
+            route = scope.get("route")
+            if route is not None:
+                template = route.path
+            elif endpoint is UNMATCHED:
+                template = UNMATCHED
+            else:
+                template = scope.get("root_path", "") + scope["path"]
+            stats = by_method[method] = RouteStats(method, template)
+        return stats
+
+    def render(self) -> str:
+        lines = [
+            "# HELP http_requests_in_flight Requests currently being served",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+        ]
+        all_stats = sorted((s for by_method in self.routes.values() for s in by_method.values()),
+                           key=lambda s: s.labels)
+        lines += ["# HELP http_request_duration_seconds Request latency by route",
+                  "# TYPE http_request_duration_seconds histogram"]
+        for s in all_stats:
+            lines += _histogram("http_request_duration_seconds", s.labels, LATENCY_BUCKETS,
+                                s.latency, s.latency_sum, s.count)
+        lines += ["# HELP http_response_size_bytes Response body size by route",
+                  "# TYPE http_response_size_bytes histogram"]
+        for s in all_stats:
+            lines += _histogram("http_response_size_bytes", s.labels, SIZE_BUCKETS, s.size, s.size_sum, s.count)
+        lines += ["# HELP http_requests_total Requests by route and status",
+                  "# TYPE http_requests_total counter"]
+        for s in all_stats:
+            for status, count in sorted(s.status.items()):
+                lines.append(f'http_requests_total{{{s.labels},status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+request_metrics = RequestMetrics()
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI (not BaseHTTPMiddleware): no extra task or body buffering per request"""
+
+    def __init__(self, app, metrics: RequestMetrics = request_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            # The router fills scope["endpoint"]/["route"] in place while handling the request
+            metrics.stats_for(scope).observe(time.perf_counter() - started, size, status)
@@ -0,0 +1,243 @@
+"""Opt-in sampling profiler for slow requests, as ASGI middleware.
+
+Shared by backend/, api/ and preco-backend/ (same file in each app dir; tests/test_shared_modules.py
+fails if the copies drift). Off unless configured; a request is profiled when its path
+starts with one of PROFILE_ROUTES or it carries `X-Profile: <PROFILE_TOKEN>`:
+
+    PROFILE_ROUTES=/api/products,/api/orders   # path prefixes, comma-separated
+    PROFILE_TOKEN=...                          # enables the per-request header and the admin listing
+    PROFILE_THRESHOLD_MS=500                   # only requests slower than this are kept
+    PROFILE_DIR=/tmp/preciosa-profiles         # ring of PROFILE_MAX_FILES files (default 50)
+    PROFILE_INTERVAL_MS=5
+
+While a profiled request runs, one background thread samples the stacks of every
+thread (the event loop and the threadpool running sync handlers, bcrypt, Motor I/O),
+so concurrent requests show up too. Profiles are written in collapsed-stack format
+("frame;frame;frame count"), readable by flamegraph.pl and speedscope.
+"""
+import os
+import sys
+import hmac
+import time
+import asyncio
+import logging
+import tempfile
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SUFFIX = ".folded"
+MAX_DEPTH = 128
+# Leaf frames in these files are threads parked on a queue, selector or idle executor, not work
+IDLE_FILES = ("threading.py", "selectors.py", "queue.py", "thread.py")
+
+
+class Session:
+    __slots__ = ("samples", "ticks")
+
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self.ticks = 0
+
+
+class StackSampler:
+    """Single daemon thread that only runs while at least one session is active"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.sessions: set = set()
+        self._labels: Dict[object, str] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> Session:
+        session = Session()
+        with self._lock:
+            self.sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self, session: Session) -> None:
+        with self._lock:
+            self.sessions.discard(session)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _collapse(self, thread_name: str, frame) -> Optional[str]:
+        if os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+            return None
+        stack = []
+        while frame is not None and len(stack) < MAX_DEPTH:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(thread_name)
+        return ";".join(reversed(stack))
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        while True:
+            self._wakeup.wait()
+            with self._lock:
+                sessions = list(self.sessions)
+                if not sessions:
+                    self._wakeup.clear()
+                    continue
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stacks = [
+                self._collapse(names.get(ident, str(ident)), frame)
+                for ident, frame in sys._current_frames().items() if ident != me
+            ]
+            stacks = [stack for stack in stacks if stack]
+            for session in sessions:
+                session.samples.update(stacks)
+                session.ticks += 1
+            time.sleep(self.interval)
+
+
+class RequestProfiler:
+    def __init__(self, directory: str, threshold: float = 0.5, max_profiles: int = 50,
+                 routes: tuple = (), token: Optional[str] = None, interval: float = 0.005):
+        self.directory = directory
+        self.threshold = threshold
+        self.max_profiles = max_profiles
+        self.routes = tuple(routes)
+        self.token = token.encode() if token else None
+        self.sampler = StackSampler(interval)
+        self._seq = 0
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        routes = [r.strip() for r in os.environ.get("PROFILE_ROUTES", "").split(",") if r.strip()]
+        return cls(
+            directory=os.environ.get("PROFILE_DIR", os.path.join(tempfile.gettempdir(), "preciosa-profiles")),
+            threshold=float(os.environ.get("PROFILE_THRESHOLD_MS", "500")) / 1000,
+            max_profiles=int(os.environ.get("PROFILE_MAX_FILES", "50")),
+            routes=tuple(routes),
+            token=os.environ.get("PROFILE_TOKEN") or None,
+            interval=float(os.environ.get("PROFILE_INTERVAL_MS", "5")) / 1000,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.routes or self.token)
+
+    def authorized(self, headers) -> bool:
+        """True when the request carries the X-Profile token (works with Starlette Headers)"""
+        return self.token is not None and hmac.compare_digest(headers.get("x-profile", "").encode(), self.token)
+
+    def wants(self, scope: dict) -> bool:
+        if self.routes and scope["path"].startswith(self.routes):
+            return True
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == b"x-profile":
+                    return hmac.compare_digest(value, self.token)
+        return False
+
+    def save(self, method: str, path: str, status: int, elapsed: float, session: Session) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._write_lock:
+            self._seq += 1
+            name = f"{time.time_ns() // 1_000_000}-{os.getpid()}-{self._seq:04d}{PROFILE_SUFFIX}"
+        header = [
+            f"# method: {method}",
+            f"# path: {path}",
+            f"# status: {status}",
+            f"# duration_ms: {elapsed * 1000:.1f}",
+            f"# samples: {session.ticks}",
+            f"# interval_ms: {self.sampler.interval * 1000:g}",
+            f"# captured_at: {datetime.now(timezone.utc).isoformat()}",
+        ]
+        body = [f"{stack} {count}" for stack, count in session.samples.most_common()]
+        tmp = os.path.join(self.directory, f".{name}.tmp")
+        with open(tmp, "w") as f:
+            f.write("\n".join(header + body) + "\n")
+        os.replace(tmp, os.path.join(self.directory, name))
+        self._trim()
+        return name
+
+    def _names(self) -> List[str]:
+        try:
+            return sorted(n for n in os.listdir(self.directory) if n.endswith(PROFILE_SUFFIX))
+        except FileNotFoundError:
+            return []
+
+    def _trim(self) -> None:
+        names = self._names()
+        for name in names[:max(0, len(names) - self.max_profiles)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass  # another worker trimmed it first
+
+    def list(self) -> List[dict]:
+        """Newest first; metadata comes from each file's header"""
+        profiles = []
+        for name in reversed(self._names()):
+            meta = {"name": name}
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    for line in f:
+                        if not line.startswith("# "):
+                            break
+                        key, _, value = line[2:].partition(": ")
+                        meta[key] = value.strip()
+            except FileNotFoundError:
+                continue
+            profiles.append(meta)
+        return profiles
+
+    def read(self, name: str) -> Optional[str]:
+        if name not in self._names():  # also rejects path traversal
+            return None
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class RequestProfilerMiddleware:
+    def __init__(self, app, profiler: RequestProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        profiler = self.profiler
+        if scope["type"] != "http" or not profiler.wants(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        session = profiler.sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            profiler.sampler.stop(session)
+            if elapsed >= profiler.threshold:
+                try:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, profiler.save, scope["method"], scope["path"], status, elapsed, session)
+                except OSError:
+                    logger.exception("Could not write request profile")
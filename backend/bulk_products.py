@@ -0,0 +1,185 @@
+import csv
+import io
+import json
+from typing import AsyncIterator, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+CSV_FIELDS = ["id", "sku", "nome", "descricao", "preco_atacado", "preco_varejo", "categoria",
+              "imagens", "estoque", "disponivel", "destaque", "created_at"]
+IMAGE_SEPARATOR = "|"
+MAX_REPORTED_ERRORS = 1000
+
+
+def _decode(line: bytes) -> str:
+    # Invalid bytes become lone surrogates, which iter_rows reports as a row error
+    return line.decode("utf-8-sig", errors="surrogateescape").rstrip("\r")
+
+
+def _is_utf8(text: str) -> bool:
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+
+def _csv_row(header: List[str], line: str) -> dict:
+    values = next(csv.reader(io.StringIO(line)))
+    row = {key: value for key, value in zip(header, values) if value != ""}
+    if "imagens" in header:
+        row["imagens"] = [url for url in row.get("imagens", "").split(IMAGE_SEPARATOR) if url]
+    for flag in ("disponivel", "destaque"):
+        if flag in row:
+            row[flag] = row[flag].strip().lower() in ("1", "true", "sim", "yes")
+    return row
+
+
+async def iter_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Joins physical lines into CSV records: a quoted field may span lines (e.g. descricao)"""
+    pending: List[str] = []
+    quotes = 0
+    async for line in lines:
+        pending.append(line)
+        quotes += line.count('"')
+        # An odd quote count means a quoted field is still open; "" escapes keep the parity.
+        # The size cap keeps one stray quote from buffering the rest of the upload
+        if quotes % 2 == 0 or sum(map(len, pending)) > csv.field_size_limit():
+            yield "\n".join(pending)
+            pending, quotes = [], 0
+    if pending:
+        yield "\n".join(pending)
+
+
+async def iter_rows(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """Yields (row number, dict, None) or (row number, None, error); row numbers are 1-based data records"""
+    header = None
+    number = 0
+    if fmt == "csv":
+        lines = iter_records(lines)
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        number += 1
+        if not _is_utf8(line):
+            yield number, None, "linha inválida: texto não está em UTF-8"
+            continue
+        try:
+            raw = _csv_row(header, line) if fmt == "csv" else json.loads(line)
+        except (ValueError, csv.Error) as e:
+            yield number, None, f"linha inválida: {e}"
+            continue
+        if not isinstance(raw, dict):
+            yield number, None, f"linha inválida: esperado um objeto JSON, recebido {type(raw).__name__}"
+            continue
+        yield number, raw, None
+
+
+def _upsert(product: BaseModel, raw: dict) -> UpdateOne:
+    doc = product.model_dump()
+    # Keep the original id/created_at of existing products; only new ones get generated values
+    on_insert = {"id": doc.pop("id"), "created_at": doc.pop("created_at")}
+    if raw.get("id"):
+        key = {"id": on_insert["id"]}
+    elif doc.get("sku"):
+        key = {"sku": doc["sku"]}
+    else:
+        key = {"id": on_insert["id"]}
+    return UpdateOne(key, {"$set": doc, "$setOnInsert": on_insert}, upsert=True)
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def as_dict(self) -> dict:
+        return {"rows": self.rows, "inserted": self.inserted, "updated": self.updated,
+                "failed": self.failed, "errors": self.errors}
+
+
+async def _flush(db, batch: List[UpdateOne], row_numbers: List[int], report: ImportReport) -> None:
+    try:
+        result = await db.products.bulk_write(batch, ordered=False)
+        report.inserted += result.upserted_count
+        report.updated += result.matched_count
+    except BulkWriteError as e:
+        details = e.details
+        report.inserted += details.get("nUpserted", 0)
+        report.updated += details.get("nMatched", 0)
+        for write_error in details.get("writeErrors", []):
+            report.error(row_numbers[write_error["index"]], write_error.get("errmsg", "erro de escrita"))
+
+
+async def import_products(db, rows: AsyncIterator[Tuple[int, Optional[dict], Optional[str]]], model: Type[BaseModel],
+                          batch_size: int = 500) -> ImportReport:
+    """Upserts rows by id or sku with unordered bulk_write batches; bad rows are reported, not fatal"""
+    report = ImportReport()
+    batch: List[UpdateOne] = []
+    row_numbers: List[int] = []
+    async for number, raw, error in rows:
+        report.rows += 1
+        if error is not None:
+            report.error(number, error)
+            continue
+        try:
+            product = model(**raw)
+        except ValidationError as e:
+            report.error(number, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            continue
+        except TypeError as e:
+            report.error(number, f"linha inválida: {e}")
+            continue
+        batch.append(_upsert(product, raw))
+        row_numbers.append(number)
+        if len(batch) >= batch_size:
+            await _flush(db, batch, row_numbers, report)
+            batch, row_numbers = [], []
+    if batch:
+        await _flush(db, batch, row_numbers, report)
+    return report
+
+
+async def export_products(cursor, fmt: str, batch_size: int = 500) -> AsyncIterator[str]:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    if fmt == "csv":
+        writer.writeheader()
+    pending = 0
+    async for doc in cursor:
+        if fmt == "csv":
+            writer.writerow(dict(doc, imagens=IMAGE_SEPARATOR.join(doc.get("imagens", []))))
+        else:
+            out.write(json.dumps(doc, ensure_ascii=False, default=str) + "\n")
+        pending += 1
+        if pending >= batch_size:
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+            pending = 0
+    if out.tell():
+        yield out.getvalue()
@@ -0,0 +1,109 @@
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class CatalogCache:
+    """In-process TTL/LRU cache for catalog reads, invalidated by bumping a version.
+
+    Fills read `version` before querying and pass it to set(), which drops the value
+    if an invalidate() or evict() ran meanwhile: the query may have read the old data.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING or entry[0] < time.monotonic():
+            if entry is not _MISSING:
+                del self._entries[key]
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> None:
+        if version is not None and version != self.version:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def evict(self, key: Hashable) -> None:
+        # Bumps the version too: a fill of this key already in flight may hold the old value
+        self.version += 1
+        self._entries.pop(key, None)
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "version": self.version,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+# Stock-only updates ($inc estoque from orders) are left out of the change stream: the
+# worker that reserved evicts that product itself, other workers catch up within the TTL
+IGNORE_STOCK_ONLY_UPDATES = [{"$match": {"$expr": {"$not": [{"$and": [
+    {"$eq": ["$operationType", "update"]},
+    {"$eq": [{"$size": {"$ifNull": ["$updateDescription.removedFields", []]}}, 0]},
+    {"$setIsSubset": [
+        {"$map": {"input": {"$objectToArray": "$updateDescription.updatedFields"}, "in": "$$this.k"}},
+        ["estoque"],
+    ]},
+]}]}}}]
+
+
+# $changeStream on a standalone server (no replica set): retrying would never succeed
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+
+async def watch_collection(collection, cache: CatalogCache, max_backoff: float = 60.0) -> None:
+    """Invalidates the cache on catalog changes; reconnects with backoff when the stream drops.
+    Stops quietly when the server does not support change streams"""
+    backoff = 1.0
+    while True:
+        try:
+            async with collection.watch(IGNORE_STOCK_ONLY_UPDATES) as stream:
+                logger.info("Change stream ativo em %s", collection.name)
+                # Changes made while the stream was down were missed
+                cache.invalidate()
+                backoff = 1.0
+                async for _ in stream:
+                    cache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except PyMongoError as e:
+            if isinstance(e, OperationFailure) and e.code == CHANGE_STREAM_UNSUPPORTED:
+                # Standalone servers do not support change streams; admin routes still invalidate
+                logger.info("Change stream indisponível em %s: %s", collection.name, e)
+                return
+            logger.warning("Change stream em %s falhou, nova tentativa em %.0fs: %s", collection.name, backoff, e)
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
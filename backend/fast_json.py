@@ -0,0 +1,64 @@
+"""Fast JSON responses for the list endpoints.
+
+Products, orders and contacts are written through their Pydantic models
+(model_dump at insert/update), so they are validated once at write time. Reads
+skip the response_model round trip (validate + jsonable_encoder + json.dumps):
+a ModelSerializer projects Mongo documents onto the model's fields, fills
+defaults that older documents may lack, and encodes with orjson. Without orjson
+installed it falls back to the stdlib json module, with the same output.
+"""
+import json
+from typing import Iterable, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def dumps(value) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """JSON response whose content may already be encoded bytes"""
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+class ModelSerializer:
+    """Pre-built projection and defaults for one model; no per-document validation"""
+
+    def __init__(self, model: Type[BaseModel]):
+        fields = model.model_fields
+        self.model = model
+        self.field_count = len(fields)
+        self.projection = {"_id": 0, **{name: 1 for name in fields}}
+        # Fields added to a model after documents were written (e.g. sku) get their static default;
+        # default_factory fields (id, created_at) are always stored
+        self.defaults = {
+            name: field.default for name, field in fields.items()
+            if not field.is_required() and field.default_factory is None
+        }
+
+    def prepare(self, doc: dict) -> dict:
+        if len(doc) < self.field_count:
+            for name, default in self.defaults.items():
+                doc.setdefault(name, default)
+        return doc
+
+    def dumps_one(self, doc: dict) -> bytes:
+        return dumps(self.prepare(doc))
+
+    def dumps_many(self, docs: Iterable[dict]) -> bytes:
+        return dumps([self.prepare(doc) for doc in docs])
+
+    def response(self, docs: Iterable[dict], headers: Optional[dict] = None) -> FastJSONResponse:
+        return FastJSONResponse(self.dumps_many(docs), headers=headers)
@@ -0,0 +1,93 @@
+import logging
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Indexes backing every lookup done by server.py
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("cpf_cnpj", ASCENDING)], name="cpf_cnpj_unique", unique=True),
+    ],
+    "products": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("sku", ASCENDING)], name="sku_unique", unique=True,
+                   partialFilterExpression={"sku": {"$type": "string"}}),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        IndexModel([("categoria", ASCENDING), ("destaque", ASCENDING), ("created_at", ASCENDING)],
+                   name="categoria_destaque_created_at"),
+    ],
+    "orders": [
+        IndexModel([("id", ASCENDING)], name="id_unique", unique=True),
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)], name="user_id_created_at"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    ],
+    "order_daily_products": [
+        IndexModel([("day", ASCENDING), ("product_id", ASCENDING)], name="day_product_id_unique", unique=True),
+    ],
+    "contacts": [
+        IndexModel([("created_at", DESCENDING)], name="created_at"),
+    ],
+}
+
+# Representative hot queries, explained by the admin index report
+HOT_QUERIES = {
+    "users.by_cpf_cnpj": ("users", {"cpf_cnpj": ""}),
+    "users.by_id": ("users", {"id": ""}),
+    "products.by_id": ("products", {"id": ""}),
+    "products.by_categoria_destaque": ("products", {"categoria": "", "destaque": True}),
+    "orders.by_user_id": ("orders", {"user_id": ""}),
+}
+
+
+async def ensure_indexes(db) -> None:
+    for collection, models in INDEXES.items():
+        try:
+            names = await db[collection].create_indexes(models)
+            logger.info("Índices garantidos em %s: %s", collection, ", ".join(names))
+        except PyMongoError as e:
+            # Duplicate data on a unique key must not keep the API from starting
+            logger.error("Falha ao criar índices em %s: %s", collection, e)
+
+
+def _summarize_plan(explain: dict) -> dict:
+    planner = explain.get("queryPlanner", {})
+    stats = explain.get("executionStats", {})
+    stages = []
+    stage = planner.get("winningPlan", {})
+    while stage:
+        label = stage.get("stage", "?")
+        if stage.get("indexName"):
+            label += f"({stage['indexName']})"
+        stages.append(label)
+        stage = stage.get("inputStage")
+    return {
+        "plan": " <- ".join(stages),
+        "docs_examined": stats.get("totalDocsExamined"),
+        "keys_examined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+        "millis": stats.get("executionTimeMillis"),
+    }
+
+
+async def index_report(db) -> dict:
+    usage = {}
+    for collection in INDEXES:
+        stats = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        usage[collection] = {s["name"]: s["accesses"]["ops"] for s in stats}
+
+    plans = {}
+    for name, (collection, query) in HOT_QUERIES.items():
+        explain = await db.command(
+            "explain", {"find": collection, "filter": query}, verbosity="executionStats"
+        )
+        plans[name] = _summarize_plan(explain)
+
+    slow = []
+    if "system.profile" in await db.list_collection_names():
+        cursor = db["system.profile"].find({}, {"_id": 0, "ns": 1, "op": 1, "millis": 1, "planSummary": 1, "ts": 1})
+        slow = await cursor.sort("millis", DESCENDING).limit(20).to_list(20)
+
+    return {"usage": usage, "plans": plans, "slow_queries": slow}
@@ -0,0 +1,145 @@
+import time
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+from pymongo import monitoring
+
+# Upper bounds in seconds, Prometheus style
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Fixed-bucket histogram; safe to observe from the Motor executor threads"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labels: str = "") -> List[str]:
+        sep = "," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{le}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class CommandMetrics(monitoring.CommandListener):
+    def __init__(self):
+        self.latency: Dict[str, Histogram] = {}
+        self.failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, command: str) -> Histogram:
+        histogram = self.latency.get(command)
+        if histogram is None:
+            with self._lock:
+                histogram = self.latency.setdefault(command, Histogram())
+        return histogram
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1e6)
+
+    def failed(self, event):
+        self._histogram(event.command_name).observe(event.duration_micros / 1e6)
+        with self._lock:
+            self.failures[event.command_name] = self.failures.get(event.command_name, 0) + 1
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    def __init__(self):
+        self.checkout_wait = Histogram()
+        self.in_use = 0
+        self.open = 0
+        self.checkout_failures = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        # Motor checks out on the executor thread that issued the operation
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        if started is not None:
+            self.checkout_wait.observe(time.perf_counter() - started)
+            self._local.started = None
+        with self._lock:
+            self.in_use += 1
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+command_metrics = CommandMetrics()
+pool_metrics = PoolMetrics()
+
+
+def render_metrics() -> str:
+    lines = [
+        "# TYPE mongo_command_duration_seconds histogram",
+    ]
+    for command, histogram in sorted(command_metrics.latency.items()):
+        lines += histogram.render("mongo_command_duration_seconds", f'command="{command}"')
+    lines.append("# TYPE mongo_command_failures_total counter")
+    for command, count in sorted(command_metrics.failures.items()):
+        lines.append(f'mongo_command_failures_total{{command="{command}"}} {count}')
+    lines += [
+        "# TYPE mongo_pool_checkout_wait_seconds histogram",
+        *pool_metrics.checkout_wait.render("mongo_pool_checkout_wait_seconds"),
+        "# TYPE mongo_pool_connections_in_use gauge",
+        f"mongo_pool_connections_in_use {pool_metrics.in_use}",
+        "# TYPE mongo_pool_connections_open gauge",
+        f"mongo_pool_connections_open {pool_metrics.open}",
+        "# TYPE mongo_pool_checkout_failures_total counter",
+        f"mongo_pool_checkout_failures_total {pool_metrics.checkout_failures}",
+    ]
+    return "\n".join(lines) + "\n"
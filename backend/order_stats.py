@@ -0,0 +1,211 @@
+"""Daily order rollups behind the admin dashboard.
+
+create_order and status changes apply $inc deltas to one document per UTC day in
+order_daily_stats and one per (day, product) in order_daily_products. Dashboard
+queries aggregate those rollups, so their cost grows with the date range, not
+with order history.
+
+Every order counts in `orders` and in `by_status`. Revenue (`revenue`,
+`by_metodo_pagamento`, `by_tipo` and the product rollups) only counts orders
+whose status is not in NON_REVENUE_STATUSES; moving an order in or out of those
+statuses moves its contribution.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+NON_REVENUE_STATUSES = frozenset({"expirado", "cancelado"})
+# Fields of an order document needed to compute its rollup contribution
+ROLLUP_FIELDS = {"_id": 0, "id": 1, "status": 1, "total": 1, "metodo_pagamento": 1,
+                 "created_at": 1, "produtos": 1, "cliente_tipo": 1}
+
+
+def _key(value: Optional[str]) -> str:
+    # Values become field names in $inc paths: no dots, no leading $
+    return (value or "desconhecido").replace(".", "_").replace("$", "_")
+
+
+def _day(order: dict) -> str:
+    return order["created_at"][:10]
+
+
+def counts_as_revenue(status: str) -> bool:
+    return status not in NON_REVENUE_STATUSES
+
+
+def _add(inc: Dict[str, float], field: str, value: float) -> None:
+    inc[field] = inc.get(field, 0) + value
+
+
+def _status_delta(inc: dict, order: dict, status: str, sign: int) -> None:
+    _add(inc, f"by_status.{_key(status)}.orders", sign)
+    _add(inc, f"by_status.{_key(status)}.revenue", sign * order["total"])
+
+
+def _revenue_delta(inc: dict, order: dict, sign: int) -> None:
+    total = sign * order["total"]
+    _add(inc, "revenue", total)
+    for field, value in (("by_metodo_pagamento", order.get("metodo_pagamento")),
+                         ("by_tipo", order.get("cliente_tipo"))):
+        _add(inc, f"{field}.{_key(value)}.orders", sign)
+        _add(inc, f"{field}.{_key(value)}.revenue", total)
+
+
+def _product_updates(order: dict, sign: int) -> List[UpdateOne]:
+    day = _day(order)
+    return [
+        UpdateOne(
+            {"day": day, "product_id": item["product_id"]},
+            {"$inc": {"quantidade": sign * item["quantidade"],
+                      "revenue": sign * item["quantidade"] * item["preco_unitario"]},
+             "$set": {"nome": item["nome"]}},
+            upsert=True,
+        )
+        for item in order["produtos"]
+    ]
+
+
+async def _apply(db, order: dict, inc: dict, product_sign: int) -> None:
+    if inc:
+        await db.order_daily_stats.update_one({"_id": _day(order)}, {"$inc": inc}, upsert=True)
+    if product_sign and order.get("produtos"):
+        await db.order_daily_products.bulk_write(_product_updates(order, product_sign), ordered=False)
+
+
+async def record_order(db, order: dict) -> None:
+    """Adds a newly inserted order (with cliente_tipo set) to its day's rollups"""
+    inc = {"orders": 1}
+    _status_delta(inc, order, order["status"], 1)
+    revenue = counts_as_revenue(order["status"])
+    if revenue:
+        _revenue_delta(inc, order, 1)
+    await _apply(db, order, inc, 1 if revenue else 0)
+
+
+async def record_status_change(db, before: dict, new_status: str) -> None:
+    """`before` is the order as it was prior to the update (projection ROLLUP_FIELDS)"""
+    old_status = before.get("status", "pendente")
+    if old_status == new_status:
+        return
+    inc = {}
+    _status_delta(inc, before, old_status, -1)
+    _status_delta(inc, before, new_status, 1)
+    product_sign = 0
+    if counts_as_revenue(old_status) != counts_as_revenue(new_status):
+        product_sign = 1 if counts_as_revenue(new_status) else -1
+        _revenue_delta(inc, before, product_sign)
+    await _apply(db, before, inc, product_sign)
+
+
+async def rebuild_rollups(db) -> int:
+    """Recomputes every rollup from the orders collection; for backfills, run with writes paused"""
+    tipos = {user["id"]: user.get("tipo") async for user in db.users.find({}, {"_id": 0, "id": 1, "tipo": 1})}
+    days: Dict[str, dict] = defaultdict(dict)
+    products: Dict[tuple, dict] = {}
+    count = 0
+    async for order in db.orders.find({}, {**ROLLUP_FIELDS, "user_id": 1}):
+        order.setdefault("cliente_tipo", tipos.get(order["user_id"]))
+        order.setdefault("status", "pendente")
+        inc = days[_day(order)]
+        _add(inc, "orders", 1)
+        _status_delta(inc, order, order["status"], 1)
+        if counts_as_revenue(order["status"]):
+            _revenue_delta(inc, order, 1)
+            for item in order.get("produtos", []):
+                row = products.setdefault((_day(order), item["product_id"]), {
+                    "day": _day(order), "product_id": item["product_id"], "quantidade": 0, "revenue": 0.0})
+                row["nome"] = item["nome"]
+                row["quantidade"] += item["quantidade"]
+                row["revenue"] += item["quantidade"] * item["preco_unitario"]
+        count += 1
+
+    await db.order_daily_stats.delete_many({})
+    await db.order_daily_products.delete_many({})
+    if days:
+        await db.order_daily_stats.insert_many([_nest({"_id": day}, inc) for day, inc in days.items()])
+    if products:
+        await db.order_daily_products.insert_many(list(products.values()))
+    return count
+
+
+async def backfill_rollups(db) -> Optional[int]:
+    """Rebuilds once when orders exist but the rollups are empty (first start with rollups),
+    so status changes on older orders don't apply deltas to days that were never counted"""
+    if await db.order_daily_stats.find_one({}, {"_id": 1}) is not None:
+        return None
+    if await db.orders.find_one({}, {"_id": 1}) is None:
+        return None
+    return await rebuild_rollups(db)
+
+
+def _nest(doc: dict, inc: dict) -> dict:
+    # Turns dotted $inc paths into the nested document $inc would have produced
+    for path, value in inc.items():
+        *parents, leaf = path.split(".")
+        target = doc
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+    return doc
+
+
+def _breakdown(field: str) -> List[dict]:
+    return [
+        {"$project": {"entries": {"$objectToArray": {"$ifNull": [f"${field}", {}]}}}},
+        {"$unwind": "$entries"},
+        {"$group": {"_id": "$entries.k", "orders": {"$sum": "$entries.v.orders"},
+                    "revenue": {"$sum": "$entries.v.revenue"}}},
+        {"$match": {"orders": {"$ne": 0}}},  # keys left at zero after status moves
+        {"$sort": {"revenue": -1}},
+    ]
+
+
+def _rounded(rows: Iterable[dict], key: Optional[str] = None) -> List[dict]:
+    out = []
+    for row in rows:
+        row = dict(row, revenue=round(row.get("revenue", 0), 2))
+        if key:
+            row[key] = row.pop("_id")
+        out.append(row)
+    return out
+
+
+async def revenue_summary(db, start: str, end: str) -> dict:
+    pipeline = [
+        {"$match": {"_id": {"$gte": start, "$lte": end}}},
+        {"$facet": {
+            "days": [{"$sort": {"_id": 1}},
+                     {"$project": {"_id": 0, "day": "$_id", "orders": 1, "revenue": 1}}],
+            "totals": [{"$group": {"_id": None, "orders": {"$sum": "$orders"}, "revenue": {"$sum": "$revenue"}}}],
+            "by_status": _breakdown("by_status"),
+            "by_metodo_pagamento": _breakdown("by_metodo_pagamento"),
+            "by_tipo": _breakdown("by_tipo"),
+        }},
+    ]
+    result = (await db.order_daily_stats.aggregate(pipeline).to_list(1))[0]
+    totals = result["totals"][0] if result["totals"] else {"orders": 0, "revenue": 0}
+    return {
+        "start": start,
+        "end": end,
+        "orders": totals["orders"],
+        "revenue": round(totals["revenue"], 2),
+        "days": _rounded(result["days"]),
+        "by_status": _rounded(result["by_status"], "status"),
+        "by_metodo_pagamento": _rounded(result["by_metodo_pagamento"], "metodo_pagamento"),
+        "by_tipo": _rounded(result["by_tipo"], "tipo"),
+    }
+
+
+async def top_products(db, start: str, end: str, limit: int) -> List[dict]:
+    pipeline = [
+        {"$match": {"day": {"$gte": start, "$lte": end}}},
+        {"$sort": {"day": 1}},  # so $last picks the most recent product name
+        {"$group": {"_id": "$product_id", "nome": {"$last": "$nome"},
+                    "quantidade": {"$sum": "$quantidade"}, "revenue": {"$sum": "$revenue"}}},
+        {"$match": {"quantidade": {"$gt": 0}}},
+        {"$sort": {"quantidade": -1, "_id": 1}},
+        {"$limit": limit},
+    ]
+    rows = await db.order_daily_products.aggregate(pipeline).to_list(limit)
+    return _rounded(rows, "product_id")
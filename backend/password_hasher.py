@@ -0,0 +1,69 @@
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasher:
+    """Runs bcrypt on a bounded thread pool so hashing never blocks the event loop"""
+
+    def __init__(self, max_workers: int = 4, rounds: int = 12):
+        self.max_workers = max_workers
+        self.rounds = rounds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = None
+        # Counters are only touched from the event loop thread
+        self.waiting = 0
+        self.active = 0
+        self.completed = 0
+        self.max_waiting = 0
+        self._wait_total = 0.0
+        self._work_total = 0.0
+
+    def _hash(self, password: str) -> str:
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(self.rounds)).decode('utf-8')
+
+    @staticmethod
+    def _verify(password: str, hashed: str) -> bool:
+        return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        async with self._slots:
+            self.waiting -= 1
+            self.active += 1
+            started = time.perf_counter()
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+            finally:
+                self.active -= 1
+                self.completed += 1
+                self._wait_total += started - queued_at
+                self._work_total += time.perf_counter() - started
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(self._verify, password, hashed)
+
+    def stats(self) -> dict:
+        done = self.completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "rounds": self.rounds,
+            "waiting": self.waiting,
+            "active": self.active,
+            "max_waiting": self.max_waiting,
+            "completed": self.completed,
+            "avg_wait_ms": round(self._wait_total / done * 1000, 2),
+            "avg_hash_ms": round(self._work_total / done * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,41 @@
+from typing import Dict, Iterable, List, Tuple
+
+from catalog_cache import CatalogCache
+
+PRICE_FIELDS = {"_id": 0, "id": 1, "nome": 1, "preco_atacado": 1, "preco_varejo": 1, "disponivel": 1}
+
+
+async def load_price_snapshots(db, cache: CatalogCache, product_ids: Iterable[str]) -> Dict[str, dict]:
+    """Returns price snapshots for the given products, fetching cache misses with a single $in query"""
+    snapshots = {}
+    missing = []
+    for product_id in set(product_ids):
+        snapshot = cache.get(('price', product_id))
+        if snapshot is None:
+            missing.append(product_id)
+        else:
+            snapshots[product_id] = snapshot
+
+    if missing:
+        version = cache.version
+        async for doc in db.products.find({"id": {"$in": missing}}, PRICE_FIELDS):
+            cache.set(('price', doc['id']), doc, version)
+            snapshots[doc['id']] = doc
+    return snapshots
+
+
+def price_order(items: List[dict], snapshots: Dict[str, dict], tipo: str) -> Tuple[List[dict], float, List[str]]:
+    """Prices each line from the snapshots; returns (priced items, total, product ids that cannot be sold)"""
+    price_field = 'preco_atacado' if tipo == 'atacado' else 'preco_varejo'
+    priced = []
+    rejected = []
+    total = 0.0
+    for item in items:
+        snapshot = snapshots.get(item['product_id'])
+        if snapshot is None or not snapshot.get('disponivel', True) or item['quantidade'] <= 0:
+            rejected.append(item['product_id'])
+            continue
+        unit_price = snapshot[price_field]
+        priced.append({**item, 'nome': snapshot['nome'], 'preco_unitario': unit_price})
+        total += unit_price * item['quantidade']
+    return priced, round(total, 2), rejected
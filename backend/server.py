@@ -1,30 +1,90 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, Header
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
+import json
+import base64
+import hashlib
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
-import bcrypt
+import asyncio
 import jwt
 
+from catalog_cache import CatalogCache, watch_collection
+from password_hasher import PasswordHasher
+from indexes import ensure_indexes, index_report
+from pricing import load_price_snapshots, price_order
+from stock import OutOfStock, StatusConflict, reserve_stock, release_stock, expire_reservations, change_order_status
+from mongo_metrics import command_metrics, pool_metrics, render_metrics
+from request_metrics import RequestMetricsMiddleware, request_metrics
+from request_profiler import RequestProfiler, RequestProfilerMiddleware
+from bulk_products import iter_lines, iter_rows, import_products, export_products
+from fast_json import FastJSONResponse, ModelSerializer
+from order_stats import record_order, rebuild_rollups, backfill_rollups, revenue_summary, top_products
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+wait_queue_timeout = os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS')
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=int(os.environ.get('MONGO_MAX_POOL_SIZE', '100')),
+    minPoolSize=int(os.environ.get('MONGO_MIN_POOL_SIZE', '0')),
+    waitQueueTimeoutMS=int(wait_queue_timeout) if wait_queue_timeout else None,
+    serverSelectionTimeoutMS=int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    event_listeners=[command_metrics, pool_metrics],
+)
 db = client[os.environ['DB_NAME']]
 
 # JWT Secret
 JWT_SECRET = os.environ.get('JWT_SECRET', 'preciosa-modas-secret-key-2024')
 JWT_ALGORITHM = 'HS256'
 
+# Catalog pagination; the default page matches the old to_list(1000) cap so clients
+# that don't follow X-Next-Cursor yet keep getting the same catalog
+PRODUCTS_PAGE_SIZE = int(os.environ.get('PRODUCTS_PAGE_SIZE', '1000'))
+PRODUCTS_MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '200'))
+PRODUCTS_SORT = [('created_at', 1), ('id', 1)]
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', '500'))
+
+# HTTP caching for catalog responses (CDN / nginx in front)
+CATALOG_CACHE_CONTROL = os.environ.get(
+    'CATALOG_CACHE_CONTROL', 'public, max-age=60, stale-while-revalidate=300'
+)
+
+# Admin dashboard: default window and day format (UTC) for the rollup queries
+DASHBOARD_DEFAULT_DAYS = int(os.environ.get('DASHBOARD_DEFAULT_DAYS', '30'))
+DAY_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+# Stock reservations held by orders still 'pendente'
+RESERVATION_TTL = timedelta(hours=float(os.environ.get('RESERVATION_TTL_HOURS', '72')))
+RESERVATION_SWEEP_INTERVAL = float(os.environ.get('RESERVATION_SWEEP_INTERVAL', '300'))
+
+# Password hashing pool (bcrypt runs off the event loop)
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get('PASSWORD_HASH_WORKERS', '4')),
+    rounds=int(os.environ.get('BCRYPT_ROUNDS', '12')),
+)
+
+# Catalog cache (invalidated by admin writes or the products change stream)
+catalog_cache = CatalogCache(
+    ttl=float(os.environ.get('CATALOG_CACHE_TTL', '60')),
+    max_entries=int(os.environ.get('CATALOG_CACHE_SIZE', '512')),
+)
+
+# Slow-request profiler, off unless PROFILE_ROUTES or PROFILE_TOKEN is set (see request_profiler.py)
+request_profiler = RequestProfiler.from_env()
+
 # Create the main app
 app = FastAPI()
 api_router = APIRouter(prefix="/api")
@@ -57,6 +117,7 @@ class UserLogin(BaseModel):
 class Product(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    sku: Optional[str] = None
     nome: str
     descricao: str
     preco_atacado: float
@@ -69,6 +130,7 @@ class Product(BaseModel):
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
 class ProductCreate(BaseModel):
+    sku: Optional[str] = None
     nome: str
     descricao: str
     preco_atacado: float
@@ -92,7 +154,7 @@ class Order(BaseModel):
     user_nome: str
     produtos: List[OrderItem]
     total: float
-    status: str = "pendente"  # pendente, confirmado, enviado, entregue
+    status: str = "pendente"  # pendente, confirmado, enviado, entregue, expirado
     metodo_pagamento: str  # pix, cartao, boleto
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
 
@@ -100,7 +162,7 @@ class OrderCreate(BaseModel):
     user_id: str
     user_nome: str
     produtos: List[OrderItem]
-    total: float
+    total: Optional[float] = None  # ignorado: o total é recalculado no servidor
     metodo_pagamento: str
 
 class Contact(BaseModel):
@@ -118,6 +180,11 @@ class ContactCreate(BaseModel):
     telefone: str
     mensagem: str
 
+# Pre-built serializers for the list endpoints (see fast_json.py)
+product_serializer = ModelSerializer(Product)
+order_serializer = ModelSerializer(Order)
+contact_serializer = ModelSerializer(Contact)
+
 class AdminLogin(BaseModel):
     username: str
     senha: str
@@ -127,11 +194,11 @@ class TokenResponse(BaseModel):
     user: User
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.verify(password, hashed)
 
 def create_token(user_id: str) -> str:
     payload = {
@@ -140,6 +207,60 @@ def create_token(user_id: str) -> str:
     }
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def encode_cursor(doc: dict) -> str:
+    raw = json.dumps([doc['created_at'], doc['id']]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> dict:
+    """Turns an opaque cursor into a keyset filter on (created_at, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+    return {'$or': [
+        {'created_at': {'$gt': created_at}},
+        {'created_at': created_at, 'id': {'$gt': last_id}},
+    ]}
+
+def compute_etag(*parts) -> str:
+    return etag_for(json.dumps(parts, sort_keys=True, default=str).encode('utf-8'))
+
+def etag_for(raw: bytes) -> str:
+    return '"' + hashlib.blake2b(raw, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate == '*' or candidate.removeprefix('W/') == etag:
+            return True
+    return False
+
+def catalog_headers(etag: str) -> dict:
+    return {'ETag': etag, 'Cache-Control': CATALOG_CACHE_CONTROL}
+
+async def stream_products(cursor, fmt: str):
+    """Serializes a Motor cursor batch by batch as NDJSON or a JSON array"""
+    ndjson = fmt == 'ndjson'
+    first = True
+    chunk = [] if ndjson else [b'[']
+    async for doc in cursor:
+        item = product_serializer.dumps_one(doc)
+        if ndjson:
+            chunk.append(item + b'\n')
+        else:
+            chunk.append(item if first else b',' + item)
+        first = False
+        if len(chunk) >= STREAM_BATCH_SIZE:
+            yield b''.join(chunk)
+            chunk = []
+    if not ndjson:
+        chunk.append(b']')
+    if chunk:
+        yield b''.join(chunk)
+
 async def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
@@ -156,7 +277,7 @@ async def register(user_data: UserCreate):
         raise HTTPException(status_code=400, detail="CPF/CNPJ já cadastrado")
     
     # Hash password
-    hashed_pw = hash_password(user_data.senha)
+    hashed_pw = await hash_password(user_data.senha)
     
     # Create user
     user_dict = user_data.model_dump()
@@ -174,7 +295,7 @@ async def register(user_data: UserCreate):
 @api_router.post("/auth/login", response_model=TokenResponse)
 async def login(login_data: UserLogin):
     user_doc = await db.users.find_one({"cpf_cnpj": login_data.cpf_cnpj})
-    if not user_doc or not verify_password(login_data.senha, user_doc['senha_hash']):
+    if not user_doc or not await verify_password(login_data.senha, user_doc['senha_hash']):
         raise HTTPException(status_code=401, detail="CPF/CNPJ ou senha inválidos")
     
     user = User(**user_doc)
@@ -199,21 +320,68 @@ async def admin_login(admin_data: AdminLogin):
 
 # Product Routes
 @api_router.get("/products", response_model=List[Product])
-async def get_products(categoria: Optional[str] = None, destaque: Optional[bool] = None):
+async def get_products(
+    categoria: Optional[str] = None,
+    destaque: Optional[bool] = None,
+    limit: int = Query(PRODUCTS_PAGE_SIZE, ge=1, le=PRODUCTS_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    stream: Optional[str] = Query(None, pattern="^(ndjson|json)$"),
+    if_none_match: Optional[str] = Header(None),
+):
     query = {}
     if categoria:
         query['categoria'] = categoria
     if destaque is not None:
         query['destaque'] = destaque
+    if cursor:
+        query.update(decode_cursor(cursor))
+    
+    # Streaming mode walks the whole (filtered) catalog without buffering it
+    if stream:
+        mongo_cursor = db.products.find(query, product_serializer.projection).sort(PRODUCTS_SORT).batch_size(STREAM_BATCH_SIZE)
+        media_type = "application/x-ndjson" if stream == "ndjson" else "application/json"
+        return StreamingResponse(stream_products(mongo_cursor, stream), media_type=media_type)
     
-    products = await db.products.find(query, {"_id": 0}).to_list(1000)
-    return products
+    cache_key = ('list', categoria, destaque, limit, cursor)
+    cached = catalog_cache.get(cache_key)
+    if cached is None:
+        version = catalog_cache.version
+        # Fetch one extra document to know whether there is a next page
+        products = await db.products.find(query, product_serializer.projection).sort(PRODUCTS_SORT).limit(limit + 1).to_list(limit + 1)
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = encode_cursor(products[-1])
+        # The page is encoded once per cache fill; hits send the cached bytes as-is
+        body = product_serializer.dumps_many(products)
+        cached = (body, next_cursor, etag_for(body + (next_cursor or '').encode('ascii')))
+        catalog_cache.set(cache_key, cached, version)
+    
+    # A cached page answers conditional requests without touching MongoDB
+    body, next_cursor, etag = cached
+    headers = catalog_headers(etag)
+    if next_cursor:
+        headers['X-Next-Cursor'] = next_cursor
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(body, headers=headers)
 
 @api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if not product:
-        raise HTTPException(status_code=404, detail="Produto não encontrado")
+async def get_product(product_id: str, response: Response, if_none_match: Optional[str] = Header(None)):
+    cached = catalog_cache.get(('product', product_id))
+    if cached is None:
+        version = catalog_cache.version
+        product = await db.products.find_one({"id": product_id}, {"_id": 0})
+        if not product:
+            raise HTTPException(status_code=404, detail="Produto não encontrado")
+        cached = (product, compute_etag(product))
+        catalog_cache.set(('product', product_id), cached, version)
+    
+    product, etag = cached
+    headers = catalog_headers(etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return product
 
 @api_router.post("/admin/products", response_model=Product)
@@ -221,6 +389,7 @@ async def create_product(product_data: ProductCreate, user_id: str = Depends(ver
     product = Product(**product_data.model_dump())
     doc = product.model_dump()
     await db.products.insert_one(doc)
+    catalog_cache.invalidate()
     return product
 
 @api_router.put("/admin/products/{product_id}", response_model=Product)
@@ -228,36 +397,156 @@ async def update_product(product_id: str, product_data: ProductCreate, user_id:
     product = Product(id=product_id, **product_data.model_dump())
     doc = product.model_dump()
     await db.products.update_one({"id": product_id}, {"$set": doc})
+    catalog_cache.invalidate()
     return product
 
 @api_router.delete("/admin/products/{product_id}")
 async def delete_product(product_id: str, user_id: str = Depends(verify_token)):
     await db.products.delete_one({"id": product_id})
+    catalog_cache.invalidate()
     return {"message": "Produto deletado"}
 
+@api_router.post("/admin/products/bulk")
+async def bulk_import_products(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: str = Depends(verify_token),
+):
+    rows = iter_rows(iter_lines(request.stream()), format)
+    report = await import_products(db, rows, Product, batch_size=BULK_BATCH_SIZE)
+    catalog_cache.invalidate()
+    return report.as_dict()
+
+@api_router.get("/admin/products/export")
+async def bulk_export_products(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    user_id: str = Depends(verify_token),
+):
+    cursor = db.products.find({}, {"_id": 0}).sort(PRODUCTS_SORT).batch_size(BULK_BATCH_SIZE)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        export_products(cursor, format, batch_size=BULK_BATCH_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=produtos.{format}"},
+    )
+
+@api_router.get("/admin/cache/stats")
+async def get_cache_stats(user_id: str = Depends(verify_token)):
+    return catalog_cache.stats()
+
+@api_router.get("/admin/indexes")
+async def get_index_report(user_id: str = Depends(verify_token)):
+    return await index_report(db)
+
+@api_router.get("/admin/password-hasher/stats")
+async def get_password_hasher_stats(user_id: str = Depends(verify_token)):
+    return password_hasher.stats()
+
+@api_router.get("/admin/profiles")
+async def list_profiles(user_id: str = Depends(verify_token)):
+    return {"enabled": request_profiler.enabled, "threshold_ms": request_profiler.threshold * 1000,
+            "profiles": await asyncio.to_thread(request_profiler.list)}
+
+@api_router.get("/admin/profiles/{name}", response_class=PlainTextResponse)
+async def get_profile(name: str, user_id: str = Depends(verify_token)):
+    profile = await asyncio.to_thread(request_profiler.read, name)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return profile
+
 # Order Routes
 @api_router.post("/orders", response_model=Order)
 async def create_order(order_data: OrderCreate):
-    order = Order(**order_data.model_dump())
+    user_doc = await db.users.find_one({"id": order_data.user_id}, {"_id": 0, "tipo": 1})
+    if not user_doc:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    
+    # Prices come from the catalog, never from the client
+    items = [item.model_dump() for item in order_data.produtos]
+    snapshots = await load_price_snapshots(db, catalog_cache, (item['product_id'] for item in items))
+    priced, total, rejected = price_order(items, snapshots, user_doc.get('tipo', 'varejo'))
+    if rejected:
+        raise HTTPException(status_code=400, detail=f"Produtos indisponíveis: {', '.join(rejected)}")
+    
+    order_dict = order_data.model_dump()
+    order_dict.update(produtos=priced, total=total)
+    order = Order(**order_dict)
+    
+    try:
+        await reserve_stock(db, priced, catalog_cache)
+    except OutOfStock as e:
+        raise HTTPException(status_code=409, detail=f"Estoque insuficiente: {e.product_id}")
+    
     doc = order.model_dump()
-    await db.orders.insert_one(doc)
+    doc['cliente_tipo'] = user_doc.get('tipo', 'varejo')  # stored for the dashboard rollups, not returned
+    try:
+        await db.orders.insert_one(doc)
+    except BaseException:
+        await release_stock(db, [(item['product_id'], item['quantidade']) for item in priced], catalog_cache)
+        raise
+    try:
+        await record_order(db, doc)
+    except Exception:
+        # The order stands; POST /admin/dashboard/rebuild resyncs the rollups
+        logger.exception("Falha ao atualizar o resumo diário do pedido %s", order.id)
     return order
 
 @api_router.get("/orders/user/{user_id}", response_model=List[Order])
 async def get_user_orders(user_id: str):
-    orders = await db.orders.find({"user_id": user_id}, {"_id": 0}).to_list(1000)
-    return orders
+    orders = await db.orders.find({"user_id": user_id}, order_serializer.projection).to_list(1000)
+    return order_serializer.response(orders)
 
 @api_router.get("/admin/orders", response_model=List[Order])
 async def get_all_orders(user_id: str = Depends(verify_token)):
-    orders = await db.orders.find({}, {"_id": 0}).to_list(1000)
-    return orders
+    orders = await db.orders.find({}, order_serializer.projection).to_list(1000)
+    return order_serializer.response(orders)
 
 @api_router.put("/admin/orders/{order_id}/status")
 async def update_order_status(order_id: str, status: str, user_id: str = Depends(verify_token)):
-    await db.orders.update_one({"id": order_id}, {"$set": {"status": status}})
+    try:
+        await change_order_status(db, order_id, status, catalog_cache)
+    except OutOfStock as e:
+        raise HTTPException(status_code=409, detail=f"Estoque insuficiente: {e.product_id}")
+    except StatusConflict:
+        raise HTTPException(status_code=409, detail="Status alterado por outra requisição, tente novamente")
     return {"message": "Status atualizado"}
 
+# Dashboard (served from the daily rollups in order_stats.py)
+def dashboard_range(start: Optional[str], end: Optional[str]) -> tuple:
+    today = datetime.now(timezone.utc).date()
+    end = end or today.isoformat()
+    start = start or (today - timedelta(days=DASHBOARD_DEFAULT_DAYS - 1)).isoformat()
+    if start > end:
+        raise HTTPException(status_code=400, detail="Data inicial depois da final")
+    return start, end
+
+@api_router.get("/admin/dashboard/revenue")
+async def get_dashboard_revenue(
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    user_id: str = Depends(verify_token),
+):
+    return await revenue_summary(db, *dashboard_range(start, end))
+
+@api_router.get("/admin/dashboard/top-products")
+async def get_dashboard_top_products(
+    start: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    end: Optional[str] = Query(None, pattern=DAY_PATTERN),
+    limit: int = Query(10, ge=1, le=100),
+    user_id: str = Depends(verify_token),
+):
+    start, end = dashboard_range(start, end)
+    return {"start": start, "end": end, "products": await top_products(db, start, end, limit)}
+
+@api_router.post("/admin/dashboard/rebuild")
+async def rebuild_dashboard(user_id: str = Depends(verify_token)):
+    return {"orders": await rebuild_rollups(db)}
+
+# Metrics Route
+@api_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return render_metrics()
+
 # Contact Route
 @api_router.post("/contact", response_model=Contact)
 async def create_contact(contact_data: ContactCreate):
@@ -268,8 +557,8 @@ async def create_contact(contact_data: ContactCreate):
 
 @api_router.get("/admin/contacts", response_model=List[Contact])
 async def get_contacts(user_id: str = Depends(verify_token)):
-    contacts = await db.contacts.find({}, {"_id": 0}).to_list(1000)
-    return contacts
+    contacts = await db.contacts.find({}, contact_serializer.projection).to_list(1000)
+    return contact_serializer.response(contacts)
 
 # Include router
 app.include_router(api_router)
@@ -280,7 +569,16 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+if request_profiler.enabled:
+    app.add_middleware(RequestProfilerMiddleware, profiler=request_profiler)
+# Outermost, so latency includes CORS and error handling
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_all_metrics():
+    return request_metrics.render() + render_metrics()
 
 logging.basicConfig(
     level=logging.INFO,
@@ -288,6 +586,45 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+catalog_watcher: Optional[asyncio.Task] = None
+reservation_sweeper: Optional[asyncio.Task] = None
+
+async def sweep_reservations():
+    while True:
+        try:
+            await expire_reservations(db, RESERVATION_TTL, catalog_cache)
+        except Exception:
+            logger.exception("Falha ao expirar reservas de estoque")
+        await asyncio.sleep(RESERVATION_SWEEP_INTERVAL)
+
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def backfill_dashboard():
+    try:
+        count = await backfill_rollups(db)
+    except Exception:
+        logger.exception("Falha ao reconstruir os agregados do dashboard")
+    else:
+        if count is not None:
+            logger.info("Agregados do dashboard reconstruídos a partir de %d pedidos", count)
+
+@app.on_event("startup")
+async def start_catalog_watcher():
+    global catalog_watcher
+    catalog_watcher = asyncio.create_task(watch_collection(db.products, catalog_cache))
+
+@app.on_event("startup")
+async def start_reservation_sweeper():
+    global reservation_sweeper
+    reservation_sweeper = asyncio.create_task(sweep_reservations())
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    for task in (catalog_watcher, reservation_sweeper):
+        if task:
+            task.cancel()
+    password_hasher.shutdown()
     client.close()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import logging
+from collections import Counter
+from datetime import datetime, timezone, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from catalog_cache import CatalogCache
+from order_stats import ROLLUP_FIELDS, record_status_change
+
+logger = logging.getLogger(__name__)
+
+# Orders in these statuses hold no stock
+RELEASED_STATUSES = frozenset({"expirado", "cancelado"})
+
+
+class OutOfStock(Exception):
+    def __init__(self, product_id: str):
+        super().__init__(product_id)
+        self.product_id = product_id
+
+
+class StatusConflict(Exception):
+    """The order's status changed between reading and updating it"""
+
+
+def _lines(items: Iterable[dict]) -> List[Tuple[str, int]]:
+    # Merge repeated products and lock in a stable order across concurrent orders
+    totals = Counter()
+    for item in items:
+        totals[item['product_id']] += item['quantidade']
+    return sorted(totals.items())
+
+
+def _evict(cache: Optional[CatalogCache], product_ids: Iterable[str]) -> None:
+    # Product detail pages carry estoque; the change stream skips stock-only updates
+    if cache is not None:
+        for product_id in product_ids:
+            cache.evict(('product', product_id))
+
+
+async def release_stock(db, lines: Iterable[Tuple[str, int]], cache: Optional[CatalogCache] = None) -> None:
+    lines = list(lines)
+    for product_id, qty in lines:
+        await db.products.update_one({"id": product_id}, {"$inc": {"estoque": qty}})
+    _evict(cache, (product_id for product_id, _ in lines))
+
+
+async def reserve_stock(db, items: Iterable[dict], cache: Optional[CatalogCache] = None) -> None:
+    """Decrements stock for every line or for none; raises OutOfStock on the first short line"""
+    reserved = []
+    try:
+        for product_id, qty in _lines(items):
+            result = await db.products.update_one(
+                {"id": product_id, "estoque": {"$gte": qty}},
+                {"$inc": {"estoque": -qty}},
+            )
+            if result.modified_count != 1:
+                raise OutOfStock(product_id)
+            reserved.append((product_id, qty))
+    except BaseException:
+        await release_stock(db, reserved, cache)
+        raise
+    _evict(cache, (product_id for product_id, _ in reserved))
+
+
+async def change_order_status(db, order_id: str, status: str, cache: Optional[CatalogCache] = None) -> Optional[dict]:
+    """Sets an order's status and moves its stock with it.
+
+    Entering a released status gives the units back; leaving one reserves them again
+    (raises OutOfStock if they were sold meanwhile). Returns None for unknown orders.
+    """
+    before = await db.orders.find_one({"id": order_id}, ROLLUP_FIELDS)
+    if before is None:
+        return None
+    old_status = before.get('status', 'pendente')
+    reacquire = old_status in RELEASED_STATUSES and status not in RELEASED_STATUSES
+    release = old_status not in RELEASED_STATUSES and status in RELEASED_STATUSES
+    if reacquire:
+        await reserve_stock(db, before['produtos'], cache)
+    # Guarded on the status we read, so stock moves exactly once per transition
+    claimed = await db.orders.find_one_and_update(
+        {"id": order_id, "status": old_status}, {"$set": {"status": status}}, projection=ROLLUP_FIELDS,
+    )
+    if claimed is None:
+        if reacquire:
+            await release_stock(db, _lines(before['produtos']), cache)
+        raise StatusConflict(order_id)
+    if release:
+        await release_stock(db, _lines(claimed['produtos']), cache)
+    await record_status_change(db, claimed, status)
+    return claimed
+
+
+async def expire_reservations(db, ttl: timedelta, cache: Optional[CatalogCache] = None) -> int:
+    """Marks orders left 'pendente' longer than ttl as 'expirado' and returns their stock"""
+    cutoff = (datetime.now(timezone.utc) - ttl).isoformat()
+    expired = 0
+    stale = db.orders.find({"status": "pendente", "created_at": {"$lt": cutoff}}, {"_id": 0, "id": 1})
+    async for order in stale:
+        # Claiming the order first guarantees its stock is released exactly once
+        claimed = await db.orders.find_one_and_update(
+            {"id": order['id'], "status": "pendente"},
+            {"$set": {"status": "expirado"}},
+            projection=ROLLUP_FIELDS,
+        )
+        if claimed:
+            await release_stock(db, _lines(claimed['produtos']), cache)
+            await record_status_change(db, claimed, "expirado")
+            expired += 1
+    if expired:
+        logger.info("%d reservas de estoque expiradas", expired)
+    return expired
@@ -0,0 +1,15 @@
+import axios from "axios";
+
+// GET /products devolve uma página por vez: segue o X-Next-Cursor até o fim do catálogo
+export async function fetchAllProducts(api, params = {}) {
+  const products = [];
+  let cursor = null;
+  do {
+    const response = await axios.get(`${api}/products`, {
+      params: cursor ? { ...params, limit: 1000, cursor } : { ...params, limit: 1000 },
+    });
+    products.push(...response.data);
+    cursor = response.headers["x-next-cursor"];
+  } while (cursor);
+  return products;
+}
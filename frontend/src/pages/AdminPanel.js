@@ -7,6 +7,7 @@ import { Tabs, TabsContent, TabsList, TabsTrigger } from '../components/ui/tabs'
 import { toast } from 'sonner';
 import { Plus, Edit, Trash2, Package, ShoppingBag } from 'lucide-react';
 import axios from 'axios';
+import { fetchAllProducts } from '../lib/products';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -53,8 +54,7 @@ const AdminPanel = () => {
 
   const fetchProducts = async () => {
     try {
-      const response = await axios.get(`${API}/products`);
-      setProducts(response.data);
+      setProducts(await fetchAllProducts(API));
     } catch (error) {
       console.error('Erro ao buscar produtos:', error);
     }
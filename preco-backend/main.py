@@ -2,8 +2,9 @@ import os
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel, EmailStr
 from jose import jwt, JWTError
 from passlib.hash import bcrypt
@@ -11,6 +12,10 @@ from passlib.hash import bcrypt
 from sqlalchemy import create_engine, ForeignKey, String, Integer, Float, DateTime
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column, relationship, Session
 
+from migrations import check_schema
+from request_metrics import RequestMetricsMiddleware, request_metrics
+from request_profiler import RequestProfiler, RequestProfilerMiddleware
+
 # ------------ Config ------------
 JWT_ALG = "HS256"
 JWT_EXPIRES_DAYS = 30
@@ -42,7 +47,7 @@ class User(Base):
 class Order(Base):
     __tablename__ = "orders"
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     total: Mapped[float] = mapped_column(Float, default=0.0)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     channel: Mapped[str] = mapped_column(String(50), default="whatsapp")
@@ -53,7 +58,7 @@ class Order(Base):
 class OrderItem(Base):
     __tablename__ = "order_items"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"))
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), index=True)
     product_id: Mapped[str] = mapped_column(String(50))
     sku: Mapped[str] = mapped_column(String(100))
     name: Mapped[str] = mapped_column(String(200))
@@ -62,7 +67,8 @@ class OrderItem(Base):
 
     order: Mapped["Order"] = relationship(back_populates="items")
 
-Base.metadata.create_all(engine)
+# Schema: versionado em migrations.py (sem create_all no import)
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "true" if DATABASE_URL.startswith("sqlite") else "false").lower() in ("1", "true", "yes")
 
 # ------------ Schemas ------------
 class RegisterIn(BaseModel):
@@ -152,6 +158,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Profiler de requests lentos: desligado sem PROFILE_ROUTES/PROFILE_TOKEN (ver request_profiler.py)
+request_profiler = RequestProfiler.from_env()
+if request_profiler.enabled:
+    app.add_middleware(RequestProfilerMiddleware, profiler=request_profiler)
+# Métricas por rota: o mais externo, para a latência incluir CORS e tratamento de erros
+app.add_middleware(RequestMetricsMiddleware, metrics=request_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return request_metrics.render()
+
+@app.get("/api/admin/profiles")
+def list_profiles(request: Request):
+    if not request_profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Envie X-Profile com o PROFILE_TOKEN")
+    return {"threshold_ms": request_profiler.threshold * 1000, "profiles": request_profiler.list()}
+
+@app.get("/api/admin/profiles/{name}", response_class=PlainTextResponse)
+def get_profile(name: str, request: Request):
+    if not request_profiler.authorized(request.headers):
+        raise HTTPException(status_code=403, detail="Envie X-Profile com o PROFILE_TOKEN")
+    profile = request_profiler.read(name)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Perfil não encontrado")
+    return profile
+
+@app.on_event("startup")
+def check_database_schema():
+    check_schema(engine, auto_migrate=AUTO_MIGRATE)
 
 # ------------ Endpoints ------------
 @app.post("/api/auth/register", response_model=AuthOut)
@@ -0,0 +1,129 @@
+"""Migrações versionadas do schema SQL.
+
+Rode uma vez por deploy, antes de subir os workers:
+
+    python migrations.py            # aplica as pendentes
+    python migrations.py --status   # mostra a versão atual
+
+Os workers só conferem a versão no startup (uma query). Mesmo arquivo em api/ e
+preco-backend/; tests/test_shared_modules.py falha se as cópias divergirem.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import (
+    MetaData, Table, Column, Index, ForeignKey, Integer, String, Float, DateTime, inspect, select, insert,
+)
+from sqlalchemy.engine import Connection, Engine
+
+logger = logging.getLogger("preciosa.migrations")
+
+# Cópia congelada das tabelas: migrações não acompanham mudanças futuras dos models
+metadata = MetaData()
+
+schema_version = Table(
+    "schema_version", metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200)),
+    Column("applied_at", DateTime),
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("name", String(200)),
+    Column("email", String(200), unique=True, index=True),
+    Column("phone", String(50), nullable=True),
+    Column("password_hash", String(255)),
+)
+
+orders = Table(
+    "orders", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", ForeignKey("users.id")),
+    Column("total", Float),
+    Column("created_at", DateTime),
+    Column("channel", String(50)),
+)
+
+order_items = Table(
+    "order_items", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("order_id", ForeignKey("orders.id")),
+    Column("product_id", String(50)),
+    Column("sku", String(100)),
+    Column("name", String(200)),
+    Column("qty", Integer),
+    Column("price", Float),
+)
+
+
+def _initial_schema(conn: Connection) -> None:
+    # checkfirst: bancos criados antes pelo create_all já têm estas tabelas
+    metadata.create_all(conn, tables=[users, orders, order_items], checkfirst=True)
+
+
+def _order_indexes(conn: Connection) -> None:
+    for index in (
+        Index("ix_order_items_order_id", order_items.c.order_id),
+        Index("ix_orders_user_id", orders.c.user_id),
+        Index("ix_orders_user_id_created_at", orders.c.user_id, orders.c.created_at),
+    ):
+        index.create(conn, checkfirst=True)
+
+
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "tabelas users, orders e order_items", _initial_schema),
+    (2, "índices de pedidos por usuário e itens por pedido", _order_indexes),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: Connection) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    versions = conn.execute(select(schema_version.c.version)).scalars().all()
+    return max(versions, default=0)
+
+
+def migrate(engine: Engine) -> int:
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+    applied = 0
+    for version, description, step in MIGRATIONS:
+        # Uma transação por passo: uma falha não deixa versão registrada pela metade
+        with engine.begin() as conn:
+            if version <= current_version(conn):
+                continue
+            logger.info("Aplicando migração %d: %s", version, description)
+            step(conn)
+            conn.execute(insert(schema_version).values(
+                version=version, description=description, applied_at=datetime.utcnow(),
+            ))
+            applied += 1
+    return applied
+
+
+def check_schema(engine: Engine, auto_migrate: bool = False) -> int:
+    """Checagem barata do startup; migra só quando auto_migrate (padrão em SQLite de dev)"""
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version < LATEST_VERSION:
+        if auto_migrate:
+            migrate(engine)
+            return LATEST_VERSION
+        logger.warning("Schema na versão %d, esperado %d: rode `python migrations.py`", version, LATEST_VERSION)
+    return version
+
+
+if __name__ == "__main__":
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    from main import engine
+
+    if "--status" in sys.argv:
+        with engine.connect() as conn:
+            print(f"schema: versão {current_version(conn)} de {LATEST_VERSION}")
+    else:
+        print(f"{migrate(engine)} migração(ões) aplicada(s)")
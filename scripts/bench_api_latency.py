@@ -0,0 +1,253 @@
+"""Latency/throughput baseline for the API, using the backend_test.py scenarios under concurrency.
+
+Runs the app in-process (httpx ASGITransport, no network) against a local stand-in:
+mongomock for backend/server.py, a fresh SQLite file for api/main.py. Each scenario
+fires --requests calls with --concurrency in flight and reports p50/p95/p99 to JSON.
+
+    python scripts/bench_api_latency.py --concurrency 50 --requests 500 --output latency.json
+    python scripts/bench_api_latency.py --mongo-url mongodb://localhost:27017 --scenarios products_list,order_create
+    python scripts/bench_api_latency.py --app api --concurrency 100
+"""
+import sys
+import os
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import platform
+import tempfile
+import statistics
+from datetime import datetime, timezone
+
+try:
+    import httpx
+except ImportError:
+    sys.exit("bench_api_latency needs httpx: pip install -r backend/requirements_old.txt")
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--app", choices=["backend", "api"], default="backend")
+parser.add_argument("--concurrency", type=int, default=20)
+parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+parser.add_argument("--scenarios", help="comma-separated subset, in the order to run")
+parser.add_argument("--products", type=int, default=50, help="catalog size seeded before the run")
+parser.add_argument("--users", type=int, default=20, help="pre-registered users for login/order scenarios")
+parser.add_argument("--mongo-url", help="real MongoDB instead of mongomock (backend only)")
+parser.add_argument("--database-url", help="SQL database instead of a temp SQLite file (api only)")
+parser.add_argument("--bcrypt-rounds", help="override BCRYPT_ROUNDS; default keeps the app's production cost")
+parser.add_argument("--output", default="latency_report.json")
+args = parser.parse_args()
+
+if args.bcrypt_rounds:
+    os.environ["BCRYPT_ROUNDS"] = args.bcrypt_rounds
+
+
+def percentile(ordered: list, p: float) -> float:
+    # Nearest-rank: always an observed latency, stable for small samples
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: list, statuses: dict, errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "status": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "mean": ms(statistics.fmean(ordered)),
+            "max": ms(ordered[-1]),
+        } if ordered else None,
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, call, expected: int) -> dict:
+    """Fires args.requests calls of `call(client, i)` with at most args.concurrency in flight"""
+    latencies = []
+    statuses = {}
+    errors = 0
+    counter = iter(range(args.requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                response = await call(client, i)
+                status = response.status_code
+            except Exception:
+                status = "exception"
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status != expected:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return summarize(latencies, statuses, errors, time.perf_counter() - started)
+
+
+# ---------- backend/server.py (Mongo): mesmos payloads do PreciosaModasAPITester ----------
+def backend_user(tag: str) -> dict:
+    return {"nome": f"Bench User {tag}", "email": f"bench{tag}@example.com", "cpf_cnpj": f"bench-{tag}",
+            "telefone": "(11) 99999-9999", "senha": "testpass123", "tipo": "atacado"}
+
+
+def backend_product(i: int) -> dict:
+    return {"nome": f"Bench Product {i}", "descricao": "Bench product description", "preco_atacado": 50.0,
+            "preco_varejo": 80.0, "categoria": "bench", "imagens": ["https://via.placeholder.com/300"],
+            # estoque folgado: order_create mede o caminho feliz, não o 409
+            "estoque": 10 ** 9, "disponivel": True, "destaque": i % 5 == 0}
+
+
+async def setup_backend(client: httpx.AsyncClient) -> dict:
+    admin = (await client.post("/api/admin/login", json={"username": "admin", "senha": "admin123"})).json()
+    admin_headers = {"Authorization": f"Bearer {admin['token']}"}
+    products = []
+    for i in range(args.products):
+        products.append((await client.post("/api/admin/products", json=backend_product(i), headers=admin_headers)).json()["id"])
+    users = []
+    for i in range(args.users):
+        user = backend_user(f"seed{i}-{uuid.uuid4().hex[:8]}")
+        registered = (await client.post("/api/auth/register", json=user)).json()
+        users.append((user, registered["user"]["id"]))
+    return {"admin_headers": admin_headers, "products": products, "users": users}
+
+
+def backend_scenarios(ctx: dict) -> dict:
+    products, users = ctx["products"], ctx["users"]
+    run_id = uuid.uuid4().hex[:8]
+
+    def order(i):
+        user, user_id = users[i % len(users)]
+        return {"user_id": user_id, "user_nome": user["nome"], "metodo_pagamento": "pix",
+                "produtos": [{"product_id": products[i % len(products)], "nome": "Bench Product",
+                              "quantidade": 2, "preco_unitario": 50.0}]}
+
+    return {
+        "register": (200, lambda c, i: c.post("/api/auth/register", json=backend_user(f"{run_id}-{i}"))),
+        "login": (200, lambda c, i: c.post("/api/auth/login", json={
+            "cpf_cnpj": users[i % len(users)][0]["cpf_cnpj"], "senha": "testpass123"})),
+        "products_list": (200, lambda c, i: c.get("/api/products")),
+        "products_featured": (200, lambda c, i: c.get("/api/products", params={"destaque": "true"})),
+        "product_detail": (200, lambda c, i: c.get(f"/api/products/{products[i % len(products)]}")),
+        "order_create": (200, lambda c, i: c.post("/api/orders", json=order(i))),
+        "user_orders": (200, lambda c, i: c.get(f"/api/orders/user/{users[i % len(users)][1]}")),
+        "admin_orders": (200, lambda c, i: c.get("/api/admin/orders", headers=ctx["admin_headers"])),
+    }
+
+
+async def load_backend():
+    # Banco descartável: nunca roda contra o DB_NAME do ambiente
+    os.environ["MONGO_URL"] = args.mongo_url or "mongodb://localhost:27017"
+    os.environ["DB_NAME"] = f"bench_{uuid.uuid4().hex[:8]}"
+    sys.path.insert(0, os.path.join(ROOT, "backend"))
+    import server
+
+    if args.mongo_url:
+        await server.app.router.startup()
+
+        async def shutdown():
+            await server.client.drop_database(os.environ["DB_NAME"])
+            await server.app.router.shutdown()
+        return server.app, setup_backend, backend_scenarios, shutdown
+
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("Without --mongo-url the backend runs on mongomock: pip install -r backend/requirements_old.txt")
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[os.environ["DB_NAME"]]
+
+    async def shutdown():
+        server.password_hasher.shutdown()
+    return server.app, setup_backend, backend_scenarios, shutdown
+
+
+# ---------- api/main.py (SQL) ----------
+async def setup_api(client: httpx.AsyncClient) -> dict:
+    users = []
+    for i in range(args.users):
+        email = f"seed{i}-{uuid.uuid4().hex[:8]}@example.com"
+        await client.post("/api/auth/register", json={"name": "Bench", "email": email, "password": "senha123"})
+        token = (await client.post("/api/auth/login", json={"email": email, "password": "senha123"})).json()["token"]
+        users.append((email, {"Authorization": f"Bearer {token}"}))
+    return {"users": users}
+
+
+def api_scenarios(ctx: dict) -> dict:
+    users = ctx["users"]
+    run_id = uuid.uuid4().hex[:8]
+    items = [{"product_id": f"p{n}", "sku": f"SKU-{n}", "name": "Produto", "qty": 2, "price": 20.0} for n in range(3)]
+    return {
+        "register": (200, lambda c, i: c.post("/api/auth/register", json={
+            "name": "Bench", "email": f"{run_id}-{i}@example.com", "password": "senha123"})),
+        "login": (200, lambda c, i: c.post("/api/auth/login", json={"email": users[i % len(users)][0], "password": "senha123"})),
+        "order_create": (200, lambda c, i: c.post("/api/orders", json={"items": items, "total": 120.0},
+                                                  headers=users[i % len(users)][1])),
+        "orders_list": (200, lambda c, i: c.get("/api/orders", headers=users[i % len(users)][1])),
+    }
+
+
+async def load_api():
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    sys.path.insert(0, os.path.join(ROOT, "api"))
+    import main
+    from migrations import migrate
+
+    migrate(main.engine)
+
+    async def shutdown():
+        main.password_pool.shutdown()
+        main.engine.dispose()
+    return main.app, setup_api, api_scenarios, shutdown
+
+
+async def main() -> dict:
+    app, setup, scenarios_for, shutdown = await (load_backend() if args.app == "backend" else load_api())
+    limits = httpx.Limits(max_connections=args.concurrency)
+    transport = httpx.ASGITransport(app=app)
+    results = {}
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+            ctx = await setup(client)
+            scenarios = scenarios_for(ctx)
+            names = args.scenarios.split(",") if args.scenarios else list(scenarios)
+            for name in names:
+                expected, call = scenarios[name]
+                results[name] = await run_scenario(client, call, expected)
+                row = results[name]
+                latency = row["latency_ms"]
+                print(f"{name:<18} {row['throughput_rps']:>9} req/s   p50 {latency['p50']:>8} ms   "
+                      f"p95 {latency['p95']:>8} ms   p99 {latency['p99']:>8} ms   erros {row['errors']}")
+    finally:
+        await shutdown()
+    return results
+
+
+started_at = datetime.now(timezone.utc).isoformat()
+endpoints = asyncio.run(main())
+if args.app == "backend":
+    store = "mongodb" if args.mongo_url else "mongomock"
+else:
+    store = args.database_url.split(":", 1)[0] if args.database_url else "sqlite"
+report = {
+    "app": args.app,
+    "store": store,
+    "concurrency": args.concurrency,
+    "requests_per_scenario": args.requests,
+    "bcrypt_rounds": os.environ.get("BCRYPT_ROUNDS", "12"),
+    "python": platform.python_version(),
+    "started_at": started_at,
+    "endpoints": endpoints,
+}
+with open(args.output, "w") as f:
+    json.dump(report, f, indent=2)
+print(f"\nrelatório: {args.output}")
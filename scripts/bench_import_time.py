@@ -0,0 +1,52 @@
+"""Startup cost of the SQL API: `python -X importtime -c "import main"` summarized.
+
+    python scripts/bench_import_time.py
+    python scripts/bench_import_time.py --runs 5 --top 15 --max-ms 1500   # falha (exit 1) acima do limite
+"""
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--runs", type=int, default=3)
+parser.add_argument("--top", type=int, default=10, help="módulos mais caros a listar")
+parser.add_argument("--max-ms", type=float, help="limite para o import de main (mediana)")
+args = parser.parse_args()
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api')
+
+
+def import_once() -> dict:
+    """Returns {module: (self_us, cumulative_us)} for one cold interpreter"""
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'import.db')}")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        sys.exit(result.stderr)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+runs = [import_once() for _ in range(args.runs)]
+total_ms = statistics.median(run["main"][1] for run in runs) / 1000
+print(f"import main: {total_ms:.1f} ms (mediana de {args.runs})")
+
+last = runs[-1]
+top_level = {name: times for name, times in last.items() if name != "main" and "." not in name}
+print(f"\n{'módulo':<32}{'cumulativo ms':>14}")
+for name, (_, cumulative) in sorted(top_level.items(), key=lambda kv: -kv[1][1])[:args.top]:
+    print(f"{name:<32}{cumulative / 1000:>14.1f}")
+
+if args.max_ms is not None and total_ms > args.max_ms:
+    print(f"\nacima do limite de {args.max_ms:.0f} ms")
+    sys.exit(1)
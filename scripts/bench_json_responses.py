@@ -0,0 +1,99 @@
+"""CPU per 1000-item list response: response_model re-validation vs the fast_json serializers.
+
+Serves the same in-memory documents from two in-process FastAPI routes per model
+(Product, Order, Contact) and measures process CPU time per response over httpx's
+ASGI transport, so both sides pay the same request overhead.
+
+    python scripts/bench_json_responses.py
+    python scripts/bench_json_responses.py --items 1000 --runs 200
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+
+parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+parser.add_argument("--items", type=int, default=1000)
+parser.add_argument("--runs", type=int, default=100)
+args = parser.parse_args()
+
+# server.py builds its Motor client at import; nothing connects during the benchmark
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "bench_json")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import fast_json
+import server
+from server import Product, Order, Contact, OrderItem, ContactCreate, ProductCreate
+
+
+def documents(model, n: int) -> List[dict]:
+    if model is Product:
+        return [Product(**ProductCreate(
+            nome=f"Vestido {i}", descricao="Vestido longo em viscose estampada, forro e bojo removível.",
+            preco_atacado=89.9, preco_varejo=149.9, categoria="vestidos", estoque=i % 40, destaque=i % 7 == 0,
+            imagens=[f"https://cdn.example.com/p/{i}/1.jpg", f"https://cdn.example.com/p/{i}/2.jpg"],
+        ).model_dump()).model_dump() for i in range(n)]
+    if model is Order:
+        return [Order(
+            user_id=f"user-{i % 50}", user_nome="Cliente Atacado", metodo_pagamento="pix", total=539.4,
+            produtos=[OrderItem(product_id=f"prod-{i}-{k}", nome=f"Vestido {k}", quantidade=2, preco_unitario=89.9)
+                      for k in range(3)],
+        ).model_dump() for i in range(n)]
+    return [Contact(**ContactCreate(
+        nome=f"Contato {i}", email=f"contato{i}@example.com", telefone="(11) 99999-9999",
+        mensagem="Gostaria de saber os prazos de entrega para compras no atacado.",
+    ).model_dump()).model_dump() for i in range(n)]
+
+
+def build_app(model, serializer, docs: List[dict]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/legacy", response_model=List[model])
+    async def legacy():
+        return [dict(doc) for doc in docs]  # Motor hands out fresh dicts per request
+
+    @app.get("/fast", response_model=List[model])
+    async def fast():
+        return serializer.response(dict(doc) for doc in docs)
+
+    return app
+
+
+async def cpu_per_response(client: httpx.AsyncClient, path: str) -> float:
+    for _ in range(5):
+        (await client.get(path)).raise_for_status()
+    samples = []
+    for _ in range(args.runs):
+        started = time.process_time()
+        response = await client.get(path)
+        samples.append(time.process_time() - started)
+        response.raise_for_status()
+    return statistics.median(samples)
+
+
+async def main():
+    cases = [("products", Product, server.product_serializer), ("orders", Order, server.order_serializer),
+             ("contacts", Contact, server.contact_serializer)]
+    print(f"CPU ms per {args.items}-item response (median of {args.runs})")
+    print(f"{'endpoint':<10}{'response_model':>16}{'fast (orjson)':>15}{'fast (json)':>13}{'speedup':>9}")
+    orjson = fast_json.orjson
+    for name, model, serializer in cases:
+        app = build_app(model, serializer, documents(model, args.items))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            legacy = await cpu_per_response(client, "/legacy")
+            fast = await cpu_per_response(client, "/fast") if orjson else float("nan")
+            fast_json.orjson = None
+            stdlib = await cpu_per_response(client, "/fast")
+            fast_json.orjson = orjson
+        best = fast if orjson else stdlib
+        print(f"{name:<10}{legacy * 1000:>16.2f}{fast * 1000:>15.2f}{stdlib * 1000:>13.2f}{legacy / best:>8.1f}x")
+
+
+asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Query count and latency of GET /api/orders for a user with many orders.
+
+Compares the old lazy-loading path (one SELECT per order for its items) with
+the single-query fetch used by api/main.py, over the whole history.
+
+    python scripts/bench_list_orders.py --orders 500 --items 5
+"""
+import sys
+import os
+import time
+import tempfile
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), "bench_orders.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+
+import main as api
+from migrations import migrate
+from sqlalchemy import event, insert
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self)
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+def legacy_list_orders(db, user_id):
+    rows = db.query(api.Order).filter(api.Order.user_id == user_id).order_by(api.Order.created_at.desc()).all()
+    return [api.OrderOut(
+        id=o.id, total=o.total, created_at=o.created_at, channel=o.channel,
+        items=[api.OrderItemOut(product_id=i.product_id, sku=i.sku, name=i.name, qty=i.qty, price=i.price) for i in o.items],
+    ) for o in rows]
+
+
+def seed(orders: int, items: int) -> int:
+    now = datetime.utcnow()
+    with api.engine.begin() as conn:
+        user_id = conn.execute(insert(api.User).values(
+            name="Atacadista", email=f"bench{time.time_ns()}@example.com", password_hash="x",
+        )).inserted_primary_key[0]
+        order_ids = [conn.execute(insert(api.Order).values(
+            user_id=user_id, total=100.0, created_at=now - timedelta(hours=n), channel="whatsapp",
+        )).inserted_primary_key[0] for n in range(orders)]
+        conn.execute(insert(api.OrderItem), [
+            {"order_id": oid, "product_id": f"p{n}", "sku": f"SKU-{n}", "name": f"Produto {n}", "qty": 6, "price": 20.0}
+            for oid in order_ids for n in range(items)
+        ])
+    return user_id
+
+
+def measure(label, fn, runs, counter):
+    samples = []
+    for _ in range(runs):
+        with api.SessionLocal() as db:
+            before = counter.count
+            started = time.perf_counter()
+            fn(db)
+            samples.append((time.perf_counter() - started) * 1000)
+            queries = counter.count - before
+    print(f"{label:<14} queries={queries:<5} p50={statistics.median(samples):.1f}ms max={max(samples):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--items", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    migrate(api.engine)
+    user_id = seed(args.orders, args.items)
+    counter = QueryCounter(api.engine)
+    measure("lazy (before)", lambda db: legacy_list_orders(db, user_id), args.runs, counter)
+    measure("joined (after)", lambda db: api.fetch_user_orders(db, user_id, limit=args.orders), args.runs, counter)
+    measure("first page", lambda db: api.fetch_user_orders(db, user_id), args.runs, counter)
+
+
+if __name__ == "__main__":
+    main()
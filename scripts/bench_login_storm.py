@@ -0,0 +1,79 @@
+"""Product-listing latency under a concurrent login storm.
+
+Compares bcrypt running inline on the event loop (old behaviour) with the
+bounded PasswordHasher pool. Listing requests are simulated by a probe that
+yields to the loop every few milliseconds and records how late it runs.
+
+    python scripts/bench_login_storm.py --logins 200 --workers 4
+"""
+import sys
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import bcrypt
+from password_hasher import PasswordHasher
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def listing_probe(stop: asyncio.Event, interval: float, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append((time.perf_counter() - started - interval) * 1000)
+
+
+async def run_storm(mode: str, logins: int, concurrency: int, rounds: int, workers: int):
+    hashed = bcrypt.hashpw(b"senha123", bcrypt.gensalt(rounds)).decode('utf-8')
+    hasher = PasswordHasher(max_workers=workers, rounds=rounds)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with gate:
+            if mode == "inline":
+                bcrypt.checkpw(b"senha123", hashed.encode('utf-8'))
+                await asyncio.sleep(0)
+            else:
+                await hasher.verify("senha123", hashed)
+
+    samples = []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(listing_probe(stop, 0.005, samples))
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+    hasher.shutdown()
+    return {
+        "mode": mode,
+        "logins_per_s": round(logins / elapsed, 1),
+        "listing_samples": len(samples),
+        "listing_p50_ms": round(statistics.median(samples), 2) if samples else None,
+        "listing_p99_ms": round(percentile(samples, 99), 2) if samples else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run_storm(mode, args.logins, args.concurrency, args.rounds, args.workers))
+        print(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Pricing cost of a 100-line wholesale order: one find_one per line vs one $in query.
+
+    MONGO_URL=mongodb://localhost:27017 python scripts/bench_order_pricing.py --lines 100
+"""
+import sys
+import os
+import time
+import uuid
+import asyncio
+import argparse
+import statistics
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from catalog_cache import CatalogCache
+from pricing import PRICE_FIELDS, load_price_snapshots, price_order
+
+
+async def price_per_line(db, items):
+    snapshots = {}
+    for item in items:
+        doc = await db.products.find_one({"id": item['product_id']}, PRICE_FIELDS)
+        if doc:
+            snapshots[doc['id']] = doc
+    return price_order(items, snapshots, 'atacado')
+
+
+async def price_batched(db, cache, items):
+    snapshots = await load_price_snapshots(db, cache, (item['product_id'] for item in items))
+    return price_order(items, snapshots, 'atacado')
+
+
+async def timed(label, runs, fn):
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<22} p50={statistics.median(samples):.2f}ms max={max(samples):.2f}ms")
+
+
+async def main(lines: int, runs: int):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'preciosa_bench')]
+    await db.products.delete_many({"bench": True})
+    products = [
+        {"id": str(uuid.uuid4()), "nome": f"Produto {i}", "preco_atacado": 40.0 + i, "preco_varejo": 80.0 + i,
+         "disponivel": True, "bench": True}
+        for i in range(lines)
+    ]
+    await db.products.insert_many(products)
+    await db.products.create_index("id")
+    items = [{"product_id": p["id"], "nome": p["nome"], "quantidade": 12, "preco_unitario": 0} for p in products]
+
+    cache = CatalogCache()
+    await timed("per-line find_one", runs, lambda: price_per_line(db, items))
+    await timed("single $in (cold)", runs, lambda: price_batched(db, CatalogCache(), items))
+    await timed("single $in (cached)", runs, lambda: price_batched(db, cache, items))
+
+    await db.products.delete_many({"bench": True})
+    client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.lines, args.runs))
@@ -0,0 +1,79 @@
+"""Streams a product catalog to/from the admin bulk endpoints.
+
+    python scripts/bulk_catalog.py import catalogo.csv --url http://localhost:8001 --token <admin token>
+    python scripts/bulk_catalog.py export catalogo.ndjson --url http://localhost:8001 --token <admin token>
+
+The format is taken from the file extension (.csv or .ndjson).
+"""
+import sys
+import os
+import argparse
+
+import requests
+
+
+def admin_token(api_url: str, username: str, senha: str) -> str:
+    response = requests.post(f"{api_url}/admin/login", json={"username": username, "senha": senha}, timeout=10)
+    response.raise_for_status()
+    return response.json()["token"]
+
+
+def file_format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "ndjson"
+
+
+def import_file(api_url: str, headers: dict, path: str) -> int:
+    with open(path, "rb") as f:
+        # requests streams file objects in chunks instead of loading them in memory
+        response = requests.post(
+            f"{api_url}/admin/products/bulk",
+            params={"format": file_format(path)},
+            data=f,
+            headers=headers,
+            timeout=None,
+        )
+    response.raise_for_status()
+    report = response.json()
+    print(f"📦 {report['rows']} linhas: {report['inserted']} inseridos, "
+          f"{report['updated']} atualizados, {report['failed']} com erro")
+    for error in report["errors"]:
+        print(f"  linha {error['row']}: {error['error']}")
+    return 1 if report["failed"] else 0
+
+
+def export_file(api_url: str, headers: dict, path: str) -> int:
+    with requests.get(
+        f"{api_url}/admin/products/export",
+        params={"format": file_format(path)},
+        headers=headers,
+        stream=True,
+        timeout=None,
+    ) as response:
+        response.raise_for_status()
+        with open(path, "wb") as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+    print(f"✅ Catálogo exportado para {path}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["import", "export"])
+    parser.add_argument("path")
+    parser.add_argument("--url", default=os.environ.get("BACKEND_URL", "http://localhost:8001"))
+    parser.add_argument("--token", default=os.environ.get("ADMIN_TOKEN"))
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--senha", default=os.environ.get("ADMIN_PASSWORD"))
+    args = parser.parse_args()
+
+    api_url = f"{args.url.rstrip('/')}/api"
+    token = args.token or admin_token(api_url, args.username, args.senha)
+    headers = {"Authorization": f"Bearer {token}"}
+    if args.command == "import":
+        return import_file(api_url, headers, args.path)
+    return export_file(api_url, headers, args.path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,11 @@ sys.path.append('/app/backend')
 
 from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
+import argparse
+import random
+import time
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timezone, timedelta
 
 # Product images from vision expert
 PRODUCT_IMAGES = [
@@ -138,5 +141,205 @@ async def seed_database():
     
     client.close()
 
+# ---------- Synthetic catalog / orders for capacity planning ----------
+CATEGORY_WEIGHTS = {"vestidos": 30, "blusas": 30, "calças": 15, "conjuntos": 10, "saias": 10, "macacões": 5}
+ORDER_STATUS_WEIGHTS = {"entregue": 55, "enviado": 15, "confirmado": 15, "pendente": 10, "expirado": 5}
+PAYMENT_WEIGHTS = {"pix": 55, "cartao": 30, "boleto": 15}
+SEED_PASSWORD = "senha123"
+
+
+def pick(rng, weights):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def generate_products(rng, count, now, offset=0):
+    # offset continues numbering (sku, nome) after an earlier run, so unique keys never repeat
+    by_category = {}
+    for template in PRODUCTS:
+        by_category.setdefault(template["categoria"], []).append(template)
+    for i in range(offset, offset + count):
+        categoria = pick(rng, CATEGORY_WEIGHTS)
+        template = rng.choice(by_category.get(categoria) or PRODUCTS)
+        # Log-normal price spread around the template, wholesale kept at roughly half of retail
+        varejo = round(template["preco_varejo"] * rng.lognormvariate(0, 0.35), 2)
+        yield {
+            **template,
+            "id": str(uuid.uuid4()),
+            "sku": f"SKU-{i:07d}",
+            "nome": f"{template['nome']} {i}",
+            "categoria": categoria,
+            "preco_varejo": varejo,
+            "preco_atacado": round(varejo * rng.uniform(0.45, 0.6), 2),
+            "estoque": int(rng.expovariate(1 / 60)),
+            "disponivel": rng.random() > 0.05,
+            "destaque": rng.random() < 0.1,
+            "created_at": (now - timedelta(days=rng.uniform(0, 730))).isoformat(),
+        }
+
+
+def generate_users(rng, count, now, senha_hash, offset=0):
+    for i in range(offset, offset + count):
+        yield {
+            "id": str(uuid.uuid4()),
+            "nome": f"Cliente {i}",
+            "email": f"cliente{i}@example.com",
+            "cpf_cnpj": f"{i:014d}",
+            "telefone": f"(11) 9{rng.randint(0, 99999999):08d}",
+            "tipo": "atacado" if rng.random() < 0.8 else "varejo",
+            "senha_hash": senha_hash,
+            "created_at": (now - timedelta(days=rng.uniform(0, 730))).isoformat(),
+        }
+
+
+def generate_orders(rng, count, now, users, products):
+    for _ in range(count):
+        # Pareto-skewed customers: a few wholesale buyers reorder constantly
+        user = users[min(len(users) - 1, int(rng.paretovariate(1.2)) - 1)] if rng.random() < 0.5 else rng.choice(users)
+        atacado = user["tipo"] == "atacado"
+        lines = rng.sample(products, min(len(products), rng.randint(3, 30) if atacado else rng.randint(1, 4)))
+        produtos = [{
+            "product_id": p["id"],
+            "nome": p["nome"],
+            "quantidade": rng.randint(6, 48) if atacado else rng.randint(1, 3),
+            "preco_unitario": p["preco_atacado"] if atacado else p["preco_varejo"],
+        } for p in lines]
+        yield {
+            "id": str(uuid.uuid4()),
+            "user_id": user["id"],
+            "user_nome": user["nome"],
+            "cliente_tipo": user["tipo"],  # as create_order stores it for the dashboard rollups
+            "produtos": produtos,
+            "total": round(sum(i["quantidade"] * i["preco_unitario"] for i in produtos), 2),
+            "status": pick(rng, ORDER_STATUS_WEIGHTS),
+            "metodo_pagamento": pick(rng, PAYMENT_WEIGHTS),
+            "created_at": (now - timedelta(days=rng.uniform(0, 365))).isoformat(),
+        }
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def insert_mongo(collection, docs, batch_size, concurrency):
+    gate = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def insert(batch):
+        async with gate:
+            await collection.insert_many(batch, ordered=False)
+
+    count = 0
+    for batch in batched(docs, batch_size):
+        # Bound the number of batches built ahead of the inserts to keep memory flat
+        while len(tasks) >= concurrency * 2:
+            _, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        tasks.add(asyncio.create_task(insert(batch)))
+        count += len(batch)
+    if tasks:
+        await asyncio.gather(*tasks)
+    return count
+
+
+async def generate_mongo(args, rng, now, senha_hash):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+    from order_stats import rebuild_rollups
+
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'preciosa_modas')]
+    # Appending to an existing database: number past what is there (sku, email and cpf_cnpj are unique)
+    products = list(generate_products(rng, args.products, now, await db.products.count_documents({})))
+    users = list(generate_users(rng, args.users, now, senha_hash, await db.users.count_documents({})))
+    for name, docs in (("products", products), ("users", users),
+                       ("orders", generate_orders(rng, args.orders, now, users, products))):
+        started = time.perf_counter()
+        count = await insert_mongo(db[name], docs, args.batch_size, args.concurrency)
+        print(f"✅ {count} {name} em {time.perf_counter() - started:.1f}s")
+    # Bulk inserts skip record_order; recount the dashboard rollups from all orders
+    started = time.perf_counter()
+    count = await rebuild_rollups(db)
+    print(f"✅ resumo diário recalculado ({count} pedidos) em {time.perf_counter() - started:.1f}s")
+    client.close()
+
+
+def generate_sql(args, rng, now, senha_hash):
+    # api/main.py owns the SQL schema; point it at the target database before importing
+    os.environ['DATABASE_URL'] = args.database_url
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'api'))
+    import main as api
+    from migrations import migrate
+    from sqlalchemy import func, insert, select
+
+    migrate(api.engine)
+
+    with api.engine.begin() as conn:
+        next_user = (conn.execute(select(func.max(api.User.id))).scalar() or 0) + 1
+        next_order = (conn.execute(select(func.max(api.Order.id))).scalar() or 0) + 1
+        # Emails are unique: number them after the existing users so the script can append
+        products = list(generate_products(rng, args.products, now))
+        users = list(generate_users(rng, args.users, now, senha_hash, next_user - 1))
+        for offset, user in enumerate(users):
+            user["sql_id"] = next_user + offset
+        for batch in batched(users, args.batch_size):
+            conn.execute(insert(api.User), [
+                {"id": u["sql_id"], "name": u["nome"], "email": u["email"], "phone": u["telefone"],
+                 "password_hash": senha_hash} for u in batch
+            ])
+        print(f"✅ {len(users)} users")
+
+        started = time.perf_counter()
+        orders = generate_orders(rng, args.orders, now, users, products)
+        by_id = {u["id"]: u["sql_id"] for u in users}
+        skus = {p["id"]: p["sku"] for p in products}
+        count = 0
+        for batch in batched(orders, args.batch_size):
+            rows, items = [], []
+            for order in batch:
+                order_id = next_order + count
+                count += 1
+                rows.append({"id": order_id, "user_id": by_id[order["user_id"]], "total": order["total"],
+                             "created_at": datetime.fromisoformat(order["created_at"]).replace(tzinfo=None),
+                             "channel": "whatsapp"})
+                items += [{"order_id": order_id, "product_id": i["product_id"], "sku": skus[i["product_id"]],
+                           "name": i["nome"], "qty": i["quantidade"], "price": i["preco_unitario"]}
+                          for i in order["produtos"]]
+            conn.execute(insert(api.Order), rows)
+            conn.execute(insert(api.OrderItem), items)
+        print(f"✅ {count} orders em {time.perf_counter() - started:.1f}s")
+
+
+def generate(args):
+    import bcrypt
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+    # One bcrypt hash shared by every synthetic user keeps generation I/O bound
+    senha_hash = bcrypt.hashpw(SEED_PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    if args.target == "sql":
+        generate_sql(args, rng, now, senha_hash)
+    else:
+        asyncio.run(generate_mongo(args, rng, now, senha_hash))
+
+
 if __name__ == "__main__":
-    asyncio.run(seed_database())
+    parser = argparse.ArgumentParser(description="Popula o banco com o catálogo base ou com dados sintéticos")
+    parser.add_argument("--generate", action="store_true", help="gera N produtos, M usuários e K pedidos; acrescenta aos dados existentes")
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--target", choices=["mongo", "sql"], default="mongo")
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL", "sqlite:///./preco.db"))
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args)
+    else:
+        asyncio.run(seed_database())
@@ -0,0 +1,66 @@
+"""Fires many parallel orders at one SKU and checks that stock never goes negative.
+
+    MONGO_URL=mongodb://localhost:27017 python scripts/stress_stock_reservation.py --orders 500 --stock 120
+"""
+import sys
+import os
+import time
+import uuid
+import random
+import asyncio
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from stock import OutOfStock, reserve_stock
+
+
+async def place_order(db, product_id: str, filler_id: str, qty: int) -> int:
+    # Two lines per order so partial failures exercise the rollback path
+    items = [{"product_id": filler_id, "quantidade": 1}, {"product_id": product_id, "quantidade": qty}]
+    try:
+        await reserve_stock(db, items)
+        return qty
+    except OutOfStock:
+        return 0
+
+
+async def main(orders: int, stock: int, max_qty: int, seed: int):
+    client = AsyncIOMotorClient(os.environ.get('MONGO_URL', 'mongodb://localhost:27017'))
+    db = client[os.environ.get('DB_NAME', 'preciosa_bench')]
+    product_id, filler_id = str(uuid.uuid4()), str(uuid.uuid4())
+    await db.products.insert_many([
+        {"id": product_id, "nome": "SKU disputado", "estoque": stock},
+        {"id": filler_id, "nome": "SKU abundante", "estoque": orders * 10},
+    ])
+
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    sold = await asyncio.gather(*(
+        place_order(db, product_id, filler_id, rng.randint(1, max_qty)) for _ in range(orders)
+    ))
+    elapsed = time.perf_counter() - started
+
+    contested = await db.products.find_one({"id": product_id})
+    filler = await db.products.find_one({"id": filler_id})
+    accepted = sum(1 for qty in sold if qty)
+    print(f"orders={orders} accepted={accepted} sold={sum(sold)} remaining={contested['estoque']}")
+    print(f"throughput={orders / elapsed:.1f} orders/s elapsed={elapsed:.2f}s")
+
+    await db.products.delete_many({"id": {"$in": [product_id, filler_id]}})
+    client.close()
+
+    assert contested['estoque'] >= 0, "stock went negative"
+    assert contested['estoque'] + sum(sold) == stock, "contested SKU lost or gained units"
+    assert filler['estoque'] == orders * 10 - accepted, "rolled-back lines were not released"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--stock", type=int, default=120)
+    parser.add_argument("--max-qty", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.stock, args.max_qty, args.seed))
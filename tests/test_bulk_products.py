@@ -0,0 +1,77 @@
+import os
+import sys
+import uuid
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import BaseModel, Field
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from bulk_products import export_products, import_products, iter_lines, iter_rows  # noqa: E402
+
+
+class Item(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    nome: str
+    preco_varejo: float
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+async def chunks(body: bytes, size: int = 5):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+
+def run_import(body: bytes, fmt: str = "ndjson") -> dict:
+    async def scenario():
+        db = mongomock_motor.AsyncMongoMockClient()["test_bulk_products"]
+        report = await import_products(db, iter_rows(iter_lines(chunks(body)), fmt), Item)
+        return report.as_dict(), await db.products.count_documents({})
+    report, stored = asyncio.run(scenario())
+    assert stored == report["inserted"]
+    return report
+
+
+def test_ndjson_values_that_are_not_objects_are_row_errors():
+    body = b'{"nome": "A", "preco_varejo": 1}\n123\n[1]\n"oops"\n{"nome": "B", "preco_varejo": 2}\n'
+    report = run_import(body)
+    assert (report["rows"], report["inserted"], report["failed"]) == (5, 2, 3)
+    assert [error["row"] for error in report["errors"]] == [2, 3, 4]
+    assert report["errors"][0]["error"] == "linha inválida: esperado um objeto JSON, recebido int"
+    assert report["errors"][1]["error"].endswith("recebido list")
+    assert report["errors"][2]["error"].endswith("recebido str")
+
+
+def test_non_utf8_lines_are_row_errors():
+    body = '{"nome": "Blusa", "preco_varejo": 1}\n{"nome": "Saia Cetim", "preco_varejo": 2}\n'.encode("latin-1")
+    body += '{"nome": "Calça", "preco_varejo": 3}\n'.encode("latin-1")
+    report = run_import(body)
+    assert (report["rows"], report["inserted"], report["failed"]) == (3, 2, 1)
+    assert report["errors"] == [{"row": 3, "error": "linha inválida: texto não está em UTF-8"}]
+
+
+def test_non_utf8_csv_record_is_a_row_error():
+    body = "nome,preco_varejo\nBlusa,1\nCalça,3\n".encode("latin-1")
+    report = run_import(body, "csv")
+    assert (report["inserted"], report["failed"]) == (1, 1)
+    assert report["errors"][0]["row"] == 2
+
+
+def test_csv_export_with_multiline_fields_reimports():
+    async def docs():
+        yield {"id": "a", "nome": "Vestido", "descricao": 'Forro\n\ncom "bojo"', "imagens": ["u1", "u2"]}
+        yield {"id": "b", "nome": "Saia", "descricao": "curta", "imagens": []}
+
+    async def scenario():
+        body = "".join([part async for part in export_products(docs(), "csv")]).encode()
+        return [row async for row in iter_rows(iter_lines(chunks(body)), "csv")]
+
+    rows = asyncio.run(scenario())
+    assert [(number, error) for number, _, error in rows] == [(1, None), (2, None)]
+    assert rows[0][1]["descricao"] == 'Forro\n\ncom "bojo"'
+    assert rows[0][1]["imagens"] == ["u1", "u2"]
+    assert rows[1][1]["imagens"] == []
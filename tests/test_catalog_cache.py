@@ -0,0 +1,113 @@
+import os
+import sys
+import asyncio
+
+from pymongo.errors import AutoReconnect, OperationFailure
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+import catalog_cache  # noqa: E402
+from catalog_cache import CatalogCache, watch_collection  # noqa: E402
+from pricing import load_price_snapshots  # noqa: E402
+
+
+def test_fill_started_before_invalidate_is_dropped():
+    cache = CatalogCache()
+    version = cache.version  # cache miss: the fill reads the version, then queries
+    cache.invalidate()  # admin update lands while the query is in flight
+    cache.set(("product", "p1"), {"preco_varejo": 10.0}, version)
+    assert cache.get(("product", "p1")) is None
+
+    version = cache.version
+    cache.set(("product", "p1"), {"preco_varejo": 99.0}, version)
+    assert cache.get(("product", "p1")) == {"preco_varejo": 99.0}
+
+
+def test_fill_started_before_evict_is_dropped():
+    cache = CatalogCache()
+    version = cache.version
+    cache.evict(("product", "p1"))  # a reservation changed estoque
+    cache.set(("product", "p1"), {"estoque": 5}, version)
+    assert cache.get(("product", "p1")) is None
+
+
+class UpdatedMidQuery:
+    """products collection whose documents change (and the cache is invalidated) during the read"""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def find(self, query, projection):
+        return self._docs()
+
+    async def _docs(self):
+        yield {"id": "p1", "nome": "P1", "preco_atacado": 5.0, "preco_varejo": 10.0, "disponivel": True}
+        self.cache.invalidate()
+
+
+class FakeDb:
+    def __init__(self, cache):
+        self.products = UpdatedMidQuery(cache)
+
+
+def test_price_snapshots_from_a_racing_read_are_not_cached():
+    cache = CatalogCache()
+    snapshots = asyncio.run(load_price_snapshots(FakeDb(cache), cache, ["p1"]))
+    assert snapshots["p1"]["preco_varejo"] == 10.0  # this order saw the old row
+    assert cache.get(("price", "p1")) is None  # later orders will not
+
+
+class Stream:
+    def __init__(self, events, error=None):
+        self.events = events
+        self.error = error
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for event in self.events:
+            yield event
+        if self.error:
+            raise self.error
+
+
+class FlakyCollection:
+    name = "products"
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.watches = 0
+
+    def watch(self, pipeline):
+        self.watches += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def test_watch_collection_reconnects_after_errors(monkeypatch):
+    delays = []
+
+    async def no_sleep(seconds):
+        delays.append(seconds)
+
+    monkeypatch.setattr(catalog_cache.asyncio, "sleep", no_sleep)
+    cache = CatalogCache()
+    collection = FlakyCollection([
+        AutoReconnect("primary stepped down"),
+        AutoReconnect("still electing"),
+        Stream([{"operationType": "update"}], error=AutoReconnect("connection reset")),
+        OperationFailure("only supported on replica sets", code=40573),
+    ])
+    asyncio.run(watch_collection(collection, cache))
+    assert collection.watches == 4
+    assert delays == [1.0, 2.0, 1.0]  # backoff resets once a stream opened
+    assert cache.invalidations == 2  # on (re)connect and for the change
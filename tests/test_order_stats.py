@@ -0,0 +1,114 @@
+import os
+import sys
+import asyncio
+
+import pytest
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend"))
+
+from order_stats import backfill_rollups, rebuild_rollups, record_order, revenue_summary, top_products  # noqa: E402
+from stock import change_order_status  # noqa: E402
+
+DAY = "2026-10-18"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def make_db():
+    return mongomock_motor.AsyncMongoMockClient()["test_order_stats"]
+
+
+async def seed(db):
+    await db.users.insert_many([{"id": "u1", "tipo": "atacado"}, {"id": "u2", "tipo": "varejo"}])
+    await db.products.insert_many([{"id": "p1", "estoque": 10}, {"id": "p2", "estoque": 10}])
+
+
+async def create(db, order_id, user_id, items, metodo="pix", tipo="atacado"):
+    """Mirrors create_order: insert, then add to the rollups"""
+    doc = {
+        "id": order_id, "user_id": user_id, "status": "pendente", "metodo_pagamento": metodo,
+        "created_at": f"{DAY}T12:00:00+00:00", "cliente_tipo": tipo,
+        "produtos": [{"product_id": pid, "nome": pid.upper(), "quantidade": qty, "preco_unitario": price}
+                     for pid, qty, price in items],
+        "total": sum(qty * price for _, qty, price in items),
+    }
+    await db.orders.insert_one(dict(doc))
+    await record_order(db, doc)
+
+
+async def snapshot(db):
+    return await revenue_summary(db, DAY, DAY), await top_products(db, DAY, DAY, 10)
+
+
+def test_incremental_rollups_match_rebuild():
+    async def scenario():
+        db = make_db()
+        await seed(db)
+        await create(db, "o1", "u1", [("p1", 2, 50.0), ("p2", 1, 30.0)])
+        await create(db, "o2", "u2", [("p1", 1, 80.0)], metodo="cartao", tipo="varejo")
+        await create(db, "o3", "u1", [("p2", 3, 30.0)])
+        await change_order_status(db, "o1", "confirmado")
+        await change_order_status(db, "o2", "cancelado")
+        await change_order_status(db, "o3", "expirado")
+        await change_order_status(db, "o3", "confirmado")
+        incremental = await snapshot(db)
+        assert await rebuild_rollups(db) == 3
+        return incremental, await snapshot(db)
+
+    incremental, rebuilt = run(scenario())
+    assert incremental == rebuilt
+    summary, products = rebuilt
+    assert summary["orders"] == 3
+    assert summary["revenue"] == 220.0
+    assert {row["product_id"]: row["quantidade"] for row in products} == {"p1": 2, "p2": 4}
+
+
+def test_moving_in_and_out_of_non_revenue_statuses():
+    async def scenario():
+        db = make_db()
+        await seed(db)
+        await create(db, "o1", "u1", [("p1", 2, 50.0)])
+        steps = []
+        for status in ("cancelado", "confirmado", "expirado", "cancelado", "pendente"):
+            await change_order_status(db, "o1", status)
+            steps.append(await snapshot(db))
+        return steps
+
+    cancelled, confirmed, expired, cancelled_again, pending = run(scenario())
+    for summary, products in (cancelled, expired, cancelled_again):
+        assert summary["orders"] == 1
+        assert summary["revenue"] == 0
+        assert summary["by_metodo_pagamento"] == []
+        assert products == []
+    assert [row["status"] for row in cancelled[0]["by_status"]] == ["cancelado"]
+    assert [row["status"] for row in expired[0]["by_status"]] == ["expirado"]
+    for summary, products in (confirmed, pending):
+        assert summary["revenue"] == 100.0
+        assert summary["by_tipo"] == [{"tipo": "atacado", "orders": 1, "revenue": 100.0}]
+        assert products == [{"product_id": "p1", "nome": "P1", "quantidade": 2, "revenue": 100.0}]
+
+
+def test_backfill_only_runs_on_empty_rollups():
+    async def scenario():
+        db = make_db()
+        assert await backfill_rollups(db) is None  # no orders yet
+        await seed(db)
+        # An order written before the rollups existed
+        await db.orders.insert_one({"id": "old", "user_id": "u2", "status": "pendente", "total": 80.0,
+                                    "metodo_pagamento": "pix", "created_at": f"{DAY}T08:00:00+00:00",
+                                    "produtos": [{"product_id": "p1", "nome": "P1", "quantidade": 1,
+                                                  "preco_unitario": 80.0}]})
+        assert await backfill_rollups(db) == 1
+        assert await backfill_rollups(db) is None
+        await change_order_status(db, "old", "cancelado")
+        return await snapshot(db)
+
+    summary, products = run(scenario())
+    assert summary["orders"] == 1
+    assert summary["revenue"] == 0
+    assert summary["by_status"] == [{"status": "cancelado", "orders": 1, "revenue": 80.0}]
+    assert products == []
@@ -0,0 +1,26 @@
+"""Modules copied into each app dir (each app deploys with its own dir as root) must stay identical.
+
+Edit one copy, then copy it over the others.
+"""
+import os
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+SHARED = {
+    "migrations.py": ("api", "preco-backend"),
+    "request_metrics.py": ("backend", "api", "preco-backend"),
+    "request_profiler.py": ("backend", "api", "preco-backend"),
+}
+
+
+@pytest.mark.parametrize("name", sorted(SHARED))
+def test_copies_are_identical(name):
+    copies = {}
+    for app in SHARED[name]:
+        with open(os.path.join(ROOT, app, name), "rb") as f:
+            copies[app] = f.read()
+    first = SHARED[name][0]
+    differing = [app for app, content in copies.items() if content != copies[first]]
+    assert not differing, f"{name} differs from {first}/{name} in: {', '.join(differing)}"